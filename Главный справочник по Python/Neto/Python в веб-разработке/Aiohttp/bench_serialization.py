@@ -0,0 +1,70 @@
+# Бенчмарк сериализации на пути GET /user/{id}: bytes/sec и p50/p99 латентность для каждого бэкенда serializer
+# Приложение поднимается в этом же процессе, база — из docker-compose.yml
+# Запуск: python bench_serialization.py
+import asyncio
+import statistics
+import time
+import timeit
+import uuid
+
+from aiohttp.test_utils import TestClient, TestServer
+from sqlalchemy import delete
+
+import serializer
+import server
+from models import Session, User
+
+REQUESTS = 2000
+CONCURRENCY = 32
+
+
+def percentile(latencies, n):
+    return statistics.quantiles(latencies, n=100, method="inclusive")[n - 1]
+
+
+async def bench_get(client, user_id):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+    size = 0
+
+    async def get():
+        nonlocal size
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(f"/user/{user_id}")
+            body = await response.read()
+            latencies.append(time.perf_counter() - start)
+            size += len(body)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(get() for _ in range(REQUESTS)))
+    return size / (time.perf_counter() - start), latencies
+
+
+async def main():
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    async with TestClient(TestServer(server.app)) as client:
+        response = await client.post("/user/", json={"name": name, "password": "benchmark-password"})
+        user_id = (await response.json())["id"]
+        try:
+            async with Session() as session:
+                user = await session.get(User, user_id)
+                payload = user.dict()
+            print(f"{'backend':<10}{'dumps, us':>11}{'KiB/s':>10}{'p50, ms':>10}{'p99, ms':>10}")
+            for backend in serializer.BACKENDS:
+                serializer.use(backend)
+                dumps = timeit.timeit(lambda: serializer.dumps(payload), number=100000) / 100000 * 1e6
+                await bench_get(client, user_id)  # прогрев
+                rate, latencies = await bench_get(client, user_id)
+                print(
+                    f"{backend:<10}{dumps:>11.2f}{rate / 1024:>10.0f}"
+                    f"{percentile(latencies, 50) * 1000:>10.2f}{percentile(latencies, 99) * 1000:>10.2f}"
+                )
+        finally:
+            async with Session() as session:
+                await session.execute(delete(User).where(User.id == user_id))
+                await session.commit()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 5))
+
+
+class SingleFlightCache:
+    """TTL-кэш с объединением одновременных промахов (single-flight).
+
+    Если значение по ключу уже загружается, остальные читатели ждут тот же future,
+    а не отправляют свой запрос. invalidate() удаляет и значение, и загрузку в полёте:
+    её результат не попадёт в кэш, а новые читатели запустят свежую загрузку.
+    """
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._in_flight = {}
+        self.hits = 0
+        self.issued = 0
+        self.coalesced = 0
+
+    async def get(self, key, loader):
+        item = self._data.get(key)
+        if item is not None:
+            value, expires = item
+            if expires > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self.issued += 1
+            # Отдельная задача: отмена первого читателя не отменяет загрузку для остальных
+            task = asyncio.ensure_future(loader())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._store(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _store(self, key, task):
+        if self._in_flight.get(key) is not task:
+            return
+        del self._in_flight[key]
+        if task.cancelled() or task.exception() is not None or task.result() is None:
+            return
+        self._data[key] = (task.result(), time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+        self._in_flight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "issued": self.issued,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,58 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import bcrypt
+
+# bcrypt отпускает GIL на время хэширования, поэтому пула потоков обычно достаточно
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread")
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+HASH_CONCURRENCY = int(os.getenv("HASH_CONCURRENCY", HASH_WORKERS * 2))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+
+def _hash(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check(password: bytes, hashed_password: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed_password)
+
+
+class Hasher:
+    """Выполняет bcrypt в отдельном executor'е, не блокируя event loop.
+
+    Семафор ограничивает число одновременных задач: лишние корутины ждут
+    в loop'е, а не копятся в очереди executor'а.
+    """
+
+    def __init__(
+        self,
+        executor: str = HASH_EXECUTOR,
+        workers: int = HASH_WORKERS,
+        concurrency: int = HASH_CONCURRENCY,
+        rounds: int = BCRYPT_ROUNDS,
+    ):
+        if executor == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        elif executor == "process":
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            raise ValueError(f"Unknown hash executor: {executor}")
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.rounds = rounds
+
+    async def _run(self, func, *args):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._run(_hash, password.encode(), self.rounds)
+        return hashed.decode()
+
+    async def check(self, password: str, hashed_password: str) -> bool:
+        return await self._run(_check, password.encode(), hashed_password.encode())
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
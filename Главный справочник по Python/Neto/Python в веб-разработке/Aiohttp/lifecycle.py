@@ -0,0 +1,54 @@
+import asyncio
+import os
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import DB_POOL_SIZE, User
+
+APP_ENV = os.getenv("APP_ENV", "development")
+# В production схемой занимаются миграции, а не каждый старт процесса
+RUN_DDL = os.getenv("RUN_DDL", str(APP_ENV != "production")).lower() in ("1", "true", "yes")
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", DB_POOL_SIZE))
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", 30))
+
+
+async def _warm_connection(engine):
+    async with engine.connect() as conn:
+        # Тот же запрос, что делает session.get(User, id): после него выражение уже
+        # скомпилировано SQLAlchemy и подготовлено asyncpg на этом соединении
+        async with AsyncSession(bind=conn) as session:
+            await session.get(User, 0)
+
+
+async def warmup(engine, connections: int = DB_WARMUP_CONNECTIONS):
+    """Открывает connections соединений пула одновременно и прогревает на них запросы."""
+    if connections > 0:
+        await asyncio.gather(*(_warm_connection(engine) for _ in range(connections)))
+
+
+class RequestTracker:
+    """Считает обрабатываемые запросы, чтобы при остановке дождаться их завершения."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.draining = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def enter(self):
+        self.in_flight += 1
+        self._idle.clear()
+
+    def exit(self):
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._idle.set()
+
+    async def drain(self, timeout: float = DRAIN_TIMEOUT) -> bool:
+        """Ждёт завершения запросов не дольше timeout. Возвращает True, если успели все."""
+        self.draining = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
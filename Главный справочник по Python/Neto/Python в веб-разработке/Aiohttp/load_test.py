@@ -0,0 +1,66 @@
+# Нагрузочный тест /users/bulk и /users/stream
+# Приложение поднимается в этом же процессе, база — из docker-compose.yml (или любая из .env)
+# Запуск: python load_test.py [число пользователей]
+import asyncio
+import sys
+import time
+import uuid
+
+from aiohttp.test_utils import TestClient, TestServer
+from sqlalchemy import delete
+
+import server
+from models import Session, User
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+BATCH = 500
+CONCURRENCY = 4
+
+
+async def bulk_insert(client, names):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def send(batch):
+        async with semaphore:
+            response = await client.post("/users/bulk", json=[{"name": name, "password": "load-test-password"} for name in batch])
+            return await response.json()
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(send(names[i:i + BATCH]) for i in range(0, len(names), BATCH)))
+    elapsed = time.perf_counter() - start
+    created = sum(len(result["created"]) for result in results)
+    print(f"bulk:   {created} rows in {elapsed:.2f}s, {created / elapsed:.0f} rows/s")
+
+    # Повторная отправка: все имена должны вернуться в conflicts
+    response = await client.post("/users/bulk", json=[{"name": name, "password": "load-test-password"} for name in names[:BATCH]])
+    conflicts = len((await response.json())["conflicts"])
+    print(f"repeat: status {response.status}, {conflicts} conflicts reported")
+
+
+async def stream(client):
+    start = time.perf_counter()
+    response = await client.get("/users/stream")
+    rows = 0
+    size = 0
+    async for line in response.content:
+        rows += 1
+        size += len(line)
+    elapsed = time.perf_counter() - start
+    print(f"stream: {rows} rows, {size / 1024:.0f} KiB in {elapsed:.2f}s, {rows / elapsed:.0f} rows/s")
+
+
+async def main():
+    prefix = f"load_{uuid.uuid4().hex[:8]}_"
+    names = [f"{prefix}{i}" for i in range(USERS)]
+    async with TestClient(TestServer(server.app)) as client:
+        try:
+            await bulk_insert(client, names)
+            await stream(client)
+        finally:
+            async with Session() as session:
+                await session.execute(delete(User).where(User.name.startswith(prefix)))
+                await session.commit()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+import asyncio
+import statistics
+import time
+from collections import defaultdict, deque
+
+from sqlalchemy import event
+
+
+class LatencyStats:
+    """Счётчик латентности: общее число, среднее и перцентили по последним window замерам."""
+
+    def __init__(self, window: int = 1000):
+        self._recent = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self._recent.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def snapshot(self) -> dict:
+        result = {
+            "count": self.count,
+            "avg_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+            "p50_ms": 0.0,
+            "p99_ms": 0.0,
+        }
+        if len(self._recent) > 1:
+            quantiles = statistics.quantiles(self._recent, n=100, method="inclusive")
+            result["p50_ms"] = quantiles[49] * 1000
+            result["p99_ms"] = quantiles[98] * 1000
+        elif self._recent:
+            result["p50_ms"] = result["p99_ms"] = self._recent[0] * 1000
+        return result
+
+
+class LoopLagMonitor:
+    """Измеряет задержку event loop'а.
+
+    Фоновая задача раз в interval засыпает и смотрит, насколько позже срока проснулась.
+    Кроме того, probe() замеряет задержку call_soon в момент обработки запроса —
+    так лаг можно привязать к маршруту.
+    """
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.loop_lag = LatencyStats()
+        self.route_lag = defaultdict(LatencyStats)
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.loop_lag.observe(max(0.0, loop.time() - start - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def probe(self, route: str):
+        loop = asyncio.get_running_loop()
+        scheduled = loop.time()
+        loop.call_soon(lambda: self.route_lag[route].observe(loop.time() - scheduled))
+
+    def snapshot(self) -> dict:
+        return {
+            "loop_lag": self.loop_lag.snapshot(),
+            "route_lag": {route: stats.snapshot() for route, stats in self.route_lag.items()},
+        }
+
+
+def instrument_engine(engine, stats: LatencyStats):
+    """Вешает на движок замер времени выполнения каждого запроса."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats.observe(time.perf_counter() - conn.info["query_start_time"].pop())
+
+
+def pool_status(pool, max_overflow: int) -> dict:
+    capacity = pool.size() + max_overflow
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "capacity": capacity,
+        "saturation": pool.checkedout() / capacity if capacity else 0.0,
+    }
@@ -17,7 +17,24 @@ POSTGRES_PORT = int(os.getenv("POSTGRES_PORT", 5432))
 
 PG_DNS = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
-engine = create_async_engine(PG_DNS)
+# Пул соединений: (DB_POOL_SIZE + DB_MAX_OVERFLOW) * число процессов <= max_connections Postgres
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+# Размер кэша подготовленных выражений asyncpg на одно соединение
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 500))
+
+engine = create_async_engine(
+    PG_DNS,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args={"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+)
 Session = async_sessionmaker(engine, expire_on_commit=False)
 
 class Base(DeclarativeBase, AsyncAttrs):
@@ -34,5 +51,5 @@ class User(Base):
         return {
             "id": self.id,
             "name": self.name,
-            "registration_time": int(self.registration_time.timestamp()),
+            "registration_time": self.registration_time,
         }
\ No newline at end of file
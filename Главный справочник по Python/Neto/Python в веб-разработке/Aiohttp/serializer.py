@@ -0,0 +1,47 @@
+# Быстрая сериализация JSON: orjson или msgspec, если установлены, иначе стандартный json.
+# datetime кодируется сам (ISO 8601), поэтому в моделях не нужны isoformat()/timestamp().
+import datetime
+import json
+
+
+def _default(obj):
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_dumps(obj) -> bytes:
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+BACKENDS = {"json": (_json_dumps, json.loads)}
+
+try:
+    import orjson
+    BACKENDS["orjson"] = (orjson.dumps, orjson.loads)
+except ImportError:
+    pass
+
+try:
+    import msgspec
+
+    def _msgspec_loads(data, decode=msgspec.json.Decoder().decode):
+        # msgspec.DecodeError — не ValueError, как у json и orjson: без этого битое тело давало бы 500, а не 400
+        try:
+            return decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    BACKENDS["msgspec"] = (msgspec.json.Encoder().encode, _msgspec_loads)
+except ImportError:
+    pass
+
+
+def use(backend: str):
+    """Переключает реализацию для всего модуля: serializer.dumps/loads ищутся при каждом вызове."""
+    global BACKEND, dumps, loads
+    dumps, loads = BACKENDS[backend]
+    BACKEND = backend
+
+
+use(next(backend for backend in ("orjson", "msgspec", "json") if backend in BACKENDS))
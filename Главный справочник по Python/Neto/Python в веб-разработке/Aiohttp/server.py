@@ -1,29 +1,72 @@
+import asyncio
+import os
 from aiohttp import web
-from models import Base, User, Session, engine
-import json
+from models import Base, User, Session, engine, DB_MAX_OVERFLOW
+import serializer
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-import bcrypt
 from sqlalchemy.exc import IntegrityError
+from hashing import Hasher
+from cache import SingleFlightCache
+from lifecycle import RUN_DDL, DRAIN_TIMEOUT, RequestTracker, warmup
+from metrics import LatencyStats, LoopLagMonitor, instrument_engine, pool_status
+
+hasher_key = web.AppKey("hasher", Hasher)
+loop_lag_key = web.AppKey("loop_lag", LoopLagMonitor)
+tracker_key = web.AppKey("tracker", RequestTracker)
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 1000))
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 1000))
+
+user_cache = SingleFlightCache()
+
+query_stats = LatencyStats()
+instrument_engine(engine, query_stats)
 
 app = web.Application()
+app[tracker_key] = RequestTracker()
 
 async def orm_context(app):
     print("START")
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if RUN_DDL:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    await warmup(engine)
     yield
     await engine.dispose()
     print("FINISH")
 
+async def drain_requests(app):
+    # on_shutdown вызывается, когда новые соединения уже не принимаются, но до закрытия пула
+    tracker = app[tracker_key]
+    print(f"DRAIN: {tracker.in_flight} requests in flight")
+    if not await tracker.drain(DRAIN_TIMEOUT):
+        print(f"DRAIN: deadline reached, {tracker.in_flight} requests still running")
+
+async def hasher_context(app):
+    app[hasher_key] = Hasher()
+    yield
+    app[hasher_key].shutdown()
+
+async def loop_lag_context(app):
+    app[loop_lag_key] = LoopLagMonitor()
+    app[loop_lag_key].start()
+    yield
+    await app[loop_lag_key].stop()
+
 app.cleanup_ctx.append(orm_context)
+app.cleanup_ctx.append(hasher_context)
+app.cleanup_ctx.append(loop_lag_context)
+app.on_shutdown.append(drain_requests)
 
 async def hello_world(request: web.Request):
-    json_data = await request.json()
+    json_data = await read_json(request)
     qs = request.query
     headers = request.headers
     some_variable = int(request.match_info["some_variable"])
     print(json_data, qs, headers, some_variable)
-    return web.json_response({"hello": "world"})
+    return json_response({"hello": "world"})
 
 async def add_user(session, user):
     try:
@@ -33,14 +76,11 @@ async def add_user(session, user):
         await session.rollback()
         raise get_http_error(web.HTTPConflict, f"User with name {user.name} already exists")
 
-def hash_password(password):
-    password = password.encode()
-    return bcrypt.hashpw(password, bcrypt.gensalt()).decode('utf-8')
+async def hash_password(request: web.Request, password):
+    return await request.app[hasher_key].hash(password)
 
-def check_password(password, hashed_password):
-    password = password.encode()
-    hashed_password = hashed_password.encode()
-    return bcrypt.checkpw(password, hashed_password)
+async def check_password(request: web.Request, password, hashed_password):
+    return await request.app[hasher_key].check(password, hashed_password)
 
 async def get_user_by_id(session, user_id):
     user = await session.get(User, user_id)
@@ -48,9 +88,30 @@ async def get_user_by_id(session, user_id):
         raise get_http_error(web.HTTPNotFound, "User not found")
     return user
 
+async def load_user_dict(user_id):
+    # Своя сессия: загрузку могут ждать несколько запросов, и она не должна зависеть от сессии первого
+    async with Session() as session:
+        user = await session.get(User, user_id)
+        return user.dict() if user is not None else None
+
+async def get_user_dict(user_id):
+    user_dict = await user_cache.get(user_id, lambda: load_user_dict(user_id))
+    if user_dict is None:
+        raise get_http_error(web.HTTPNotFound, "User not found")
+    return user_dict
+
+def json_response(data, status=200):
+    return web.Response(body=serializer.dumps(data), status=status, content_type="application/json")
+
 def get_http_error(error_class, message):
-    response = json.dumps({"error": message})
-    return error_class(text=response, content_type='application/json')
+    return error_class(body=serializer.dumps({"error": message}), content_type="application/json")
+
+async def read_json(request: web.Request):
+    # serializer.loads при любом backend-е сообщает о битом JSON через ValueError
+    try:
+        return await request.json(loads=serializer.loads)
+    except ValueError:
+        raise get_http_error(web.HTTPBadRequest, "Invalid JSON body")
 
 class UserView(web.View):
     @property
@@ -59,31 +120,27 @@ class UserView(web.View):
 
     @property
     def session(self) -> AsyncSession:
-        return self.request.session
+        return get_session(self.request)
 
     async def get_user(self):
         return await get_user_by_id(self.session, self.user_id)
     
     async def get(self):
-        user = await self.get_user()
-        return web.json_response({
-            "id": user.id,
-            "name": user.name,
-            "registration_time": int(user.registration_time.timestamp()),})
+        return json_response(await get_user_dict(self.user_id))
     
     async def post(self):
-        json_data = await self.request.json()
-        json_data["password"] = hash_password(json_data["password"])
+        json_data = await read_json(self.request)
+        json_data["password"] = await hash_password(self.request, json_data["password"])
         user = User(**json_data)
         await add_user(self.session, user)
-        return web.json_response({"id": user.id})
+        return json_response({"id": user.id})
     
     async def patch(self):
-        json_data = await self.request.json()
+        json_data = await read_json(self.request)
         user = await self.get_user()
         
         if "password" in json_data:
-            json_data["password"] = hash_password(json_data["password"])
+            json_data["password"] = await hash_password(self.request, json_data["password"])
         
         for field, value in json_data.items():
             setattr(user, field, value)
@@ -93,26 +150,124 @@ class UserView(web.View):
         except IntegrityError:
             await self.session.rollback()
             raise get_http_error(web.HTTPConflict, f"User update conflict")
+        user_cache.invalidate(self.user_id)
         
-        return web.json_response({"status": "updated", "id": user.id})
+        return json_response({"status": "updated", "id": user.id})
     
     async def delete(self):
         user = await self.get_user()
         await self.session.delete(user)
         await self.session.commit()
-        return web.json_response({"status": "deleted"})
+        user_cache.invalidate(self.user_id)
+        return json_response({"status": "deleted"})
+
+async def bulk_create_users(request: web.Request):
+    items = await read_json(request)
+    if not isinstance(items, list):
+        raise get_http_error(web.HTTPBadRequest, "Expected a JSON array of users")
+    if len(items) > BULK_MAX_ITEMS:
+        raise get_http_error(web.HTTPBadRequest, f"No more than {BULK_MAX_ITEMS} users per request")
+    rows = {}
+    duplicates = []
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("name"), str) or not isinstance(item.get("password"), str):
+            raise get_http_error(web.HTTPBadRequest, "Each user must have string 'name' and 'password'")
+        if item["name"] in rows:
+            duplicates.append(item["name"])
+            continue
+        rows[item["name"]] = item["password"]
+    if not rows:
+        return json_response({"created": [], "conflicts": []})
+
+    hashed = await asyncio.gather(*(hash_password(request, password) for password in rows.values()))
+    query = (
+        pg_insert(User)
+        .values([{"name": name, "password": password} for name, password in zip(rows, hashed)])
+        .on_conflict_do_nothing(index_elements=[User.name])
+        .returning(User.id, User.name)
+    )
+    session = get_session(request)
+    created = (await session.execute(query)).all()
+    await session.commit()
+
+    created_names = {row.name for row in created}
+    return json_response({
+        "created": [{"id": row.id, "name": row.name} for row in created],
+        "conflicts": [name for name in rows if name not in created_names] + duplicates,
+    }, status=201 if len(created) == len(items) else 207)
+
+async def stream_users(request: web.Request):
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    query = select(User.id, User.name, User.registration_time).order_by(User.id)
+    # yield_per даёт серверный курсор: строки приходят пачками, а не все сразу
+    result = await get_session(request).stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+    async for rows in result.partitions():
+        await response.write(b"".join(serializer.dumps(row._asdict()) + b"\n" for row in rows))
+    await response.write_eof()
+    return response
+
+async def metrics(request: web.Request):
+    return json_response({
+        **request.app[loop_lag_key].snapshot(),
+        "pool": pool_status(engine.pool, DB_MAX_OVERFLOW),
+        "queries": query_stats.snapshot(),
+        "user_cache": user_cache.stats(),
+    })
+
+async def health(request: web.Request):
+    if request.app[tracker_key].draining:
+        raise get_http_error(web.HTTPServiceUnavailable, "Shutting down")
+    try:
+        async with asyncio.timeout(1):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        raise get_http_error(web.HTTPServiceUnavailable, f"Database unavailable: {e!r}")
+    return json_response({"status": "ok", "pool": pool_status(engine.pool, DB_MAX_OVERFLOW)})
+
+@web.middleware
+async def tracker_middleware(request: web.Request, handler):
+    tracker = request.app[tracker_key]
+    tracker.enter()
+    try:
+        return await handler(request)
+    finally:
+        tracker.exit()
+
+@web.middleware
+async def loop_lag_middleware(request: web.Request, handler):
+    resource = request.match_info.route.resource
+    # 404/405 складываются под один ключ: иначе каждый мусорный URL (и метод) заводил бы свою статистику
+    key = f"{request.method} {resource.canonical}" if resource is not None else "<unmatched>"
+    monitor = request.app[loop_lag_key]
+    monitor.probe(key)
+    try:
+        return await handler(request)
+    finally:
+        monitor.probe(key)
+
+def get_session(request: web.Request) -> AsyncSession:
+    # Сессия создаётся при первом обращении: маршруты без БД не берут соединение из пула
+    if "session" not in request:
+        request["session"] = Session()
+    return request["session"]
 
 @web.middleware
 async def session_middleware(request: web.Request, handler):
-    async with Session() as session:
-        request.session = session
-        try:
-            response = await handler(request)
-            return response
-        except Exception:
-            await session.rollback()
-            raise
+    try:
+        return await handler(request)
+    except Exception:
+        if "session" in request:
+            await request["session"].rollback()
+        raise
+    finally:
+        if "session" in request:
+            await request["session"].close()
 
+app.middlewares.append(tracker_middleware)
+app.middlewares.append(loop_lag_middleware)
 app.middlewares.append(session_middleware)
 
 app.add_routes([
@@ -121,7 +276,12 @@ app.add_routes([
     web.post("/user/", UserView),
     web.delete("/user/{user_id:\\d+}", UserView),
     web.post('/hello/world/{some_variable:\\d+}', hello_world),
+    web.post("/users/bulk", bulk_create_users),
+    web.get("/users/stream", stream_users),
+    web.get("/metrics", metrics),
+    web.get("/health", health),
 ])
 
 if __name__ == '__main__':
-    web.run_app(app, host='127.0.0.1', port=9999)
\ No newline at end of file
+    # shutdown_timeout чуть больше DRAIN_TIMEOUT: сначала дренаж в on_shutdown, потом принудительное закрытие
+    web.run_app(app, host='127.0.0.1', port=9999, shutdown_timeout=DRAIN_TIMEOUT + 5)
\ No newline at end of file
@@ -1,37 +1,199 @@
 import aiohttp
 import asyncio
 import datetime
-from models import init_orm, Session, Swapi_people
-from more_itertools import chunked
+import os
+import random
+import resource
+import sys
+import time
+from sqlalchemy import select
+from models import init_orm, CrawlState, Session
+from writers import get_writer, write_crawl_state
 
-MAX_CHUNKS = 10
+SWAPI_URL = os.getenv("SWAPI_URL", "https://swapi.dev/api")
+CONCURRENCY = int(os.getenv("CONCURRENCY", 10))     # сколько запросов всегда в полёте
+QUEUE_SIZE = int(os.getenv("QUEUE_SIZE", 1000))     # сколько готовых записей ждут записи в БД
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", 500))      # сброс в БД по размеру пачки...
+FLUSH_INTERVAL = float(os.getenv("FLUSH_INTERVAL", 1))  # ...или по времени
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", 5))
+BACKOFF_BASE = float(os.getenv("BACKOFF_BASE", 0.5))
+BACKOFF_MAX = float(os.getenv("BACKOFF_MAX", 30))
+# Перепроверять ли уже скачанные id условными запросами (If-None-Match / If-Modified-Since).
+# false — докачать только то, чего ещё нет в swapi_crawl_state
+REVALIDATE = os.getenv("REVALIDATE", "true").lower() in ("1", "true", "yes")
 
-async def get_people(people_id, session):
-        async with session.get(f"https://swapi.dev/api/people/{people_id}/", ssl=False) as response:
-            json_data = await response.json()
-            return json_data
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
-async def save_to_db(person_data):
+
+class Stats:
+    def __init__(self):
+        self.fetched = 0
+        self.not_modified = 0
+        self.skipped = 0
+        self.missing = 0
+        self.failed = 0
+        self.retries = 0
+        self.saved = 0
+
+
+def backoff(attempt, retry_after=None):
+    # Экспоненциальная задержка с full jitter; Retry-After от сервера важнее
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+async def load_crawl_state():
     async with Session() as session:
-        orm_objects = [Swapi_people(json=people_json) for people_json in person_data]
-        session.add_all(orm_objects)
-        await session.commit()
-    
+        rows = await session.execute(select(CrawlState.swapi_id, CrawlState.status, CrawlState.etag, CrawlState.last_modified))
+        return {row.swapi_id: row for row in rows}
+
+
+async def get_people(people_id, session, stats, state=None):
+    headers = {}
+    if state is not None and state.status == "ok":
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+    for attempt in range(MAX_RETRIES + 1):
+        retry_after = None
+        try:
+            async with session.get(f"{SWAPI_URL}/people/{people_id}/", headers=headers, ssl=False) as response:
+                if response.status == 304:
+                    stats.not_modified += 1
+                    return None
+                if response.status == 404:
+                    stats.missing += 1
+                    return {"swapi_id": people_id, "status": "missing", "etag": None, "last_modified": None, "person": None}
+                if response.status < 400:
+                    stats.fetched += 1
+                    return {
+                        "swapi_id": people_id,
+                        "status": "ok",
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "person": await response.json(),
+                    }
+                if response.status not in RETRY_STATUSES:
+                    break
+                if response.headers.get("Retry-After", "").isdigit():
+                    retry_after = int(response.headers["Retry-After"])
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            pass
+        if attempt < MAX_RETRIES:
+            stats.retries += 1
+            await asyncio.sleep(backoff(attempt, retry_after))
+    stats.failed += 1
+    return None
+
 
-async def main():
+async def produce(people_ids, session, queue, stats, crawl_state):
+    # Семафор держит в полёте ровно CONCURRENCY запросов: как только один завершился, стартует следующий.
+    # Задач одновременно не больше CONCURRENCY, поэтому память не растёт с числом id
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    tasks = set()
+
+    async def fetch(people_id):
+        try:
+            try:
+                item = await get_people(people_id, session, stats, crawl_state.get(people_id))
+            except Exception as e:
+                # Битое тело (ContentTypeError, ClientPayloadError, невалидный JSON): задача уже снята
+                # из tasks done-callback-ом, и без этого ошибка потерялась бы вместе с id
+                stats.failed += 1
+                print(f"people/{people_id}: {type(e).__name__}: {e}", file=sys.stderr)
+                return
+            if item is not None:
+                # Если писатель не успевает, put ждёт, слот семафора не освобождается — producer встаёт
+                await queue.put(item)
+        finally:
+            semaphore.release()
+
+    try:
+        for people_id in people_ids:
+            if not REVALIDATE and people_id in crawl_state:
+                stats.skipped += 1
+                continue
+            await semaphore.acquire()
+            task = asyncio.create_task(fetch(people_id))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+    except asyncio.CancelledError:
+        # Отмена producer-а (писатель упал) гасит и запросы в полёте, иначе они так и висят на queue.put
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def write(queue, stats, save):
+    loop = asyncio.get_running_loop()
+    batch = []
+    deadline = loop.time() + FLUSH_INTERVAL
+    done = False
+    while not done:
+        try:
+            item = await asyncio.wait_for(queue.get(), max(0, deadline - loop.time()))
+            if item is None:
+                done = True
+            else:
+                batch.append(item)
+        except asyncio.TimeoutError:
+            pass
+        if batch and (done or len(batch) >= BATCH_SIZE or loop.time() >= deadline):
+            people = [item.pop("person") for item in batch]
+            people = [person for person in people if person is not None]
+            # Сначала данные, потом отметка в crawl state: при падении между ними id скачается повторно,
+            # а upsert по swapi_id не даст дубля
+            if people:
+                await save(people)
+            await write_crawl_state(batch)
+            stats.saved += len(people)
+            batch = []
+        if loop.time() >= deadline:
+            deadline = loop.time() + FLUSH_INTERVAL
+
+
+async def main(people_ids):
     await init_orm()
-    async with aiohttp.ClientSession() as session:
-        people_ids = chunked(range(1, 10), MAX_CHUNKS)
-        for chunk in people_ids:
-            coros = [get_people(people_id, session) for people_id in chunk]
-            results = await asyncio.gather(*coros)
-            asyncio.create_task(save_to_db(results))
-
-        main_task = asyncio.current_task()
-        current_task = asyncio.all_tasks()
-        current_task.remove(main_task)
-        await asyncio.gather(*current_task)
-start = datetime.datetime.now()
-asyncio.run(main())
-end = datetime.datetime.now()
-print(f"Time spent: {end - start}")
\ No newline at end of file
+    stats = Stats()
+    crawl_state = await load_crawl_state()
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    start = time.perf_counter()
+    writer = asyncio.create_task(write(queue, stats, get_writer()))
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=CONCURRENCY)) as session:
+        producer = asyncio.create_task(produce(people_ids, session, queue, stats, crawl_state))
+        # Если писатель упал, очередь больше никто не разбирает: fetch-задачи висят на put, producer — на семафоре.
+        # Поэтому ждём обе задачи и при падении писателя отменяем producer и пробрасываем ошибку
+        await asyncio.wait({producer, writer}, return_when=asyncio.FIRST_COMPLETED)
+        if writer.done():
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            writer.result()
+            raise RuntimeError("writer stopped before the crawl finished")
+        await producer
+    # Писатель может упасть и после producer-а, пока очередь полна: тогда put(None) ждал бы вечно
+    sentinel = asyncio.create_task(queue.put(None))
+    await asyncio.wait({sentinel, writer}, return_when=asyncio.FIRST_COMPLETED)
+    if not sentinel.done():
+        sentinel.cancel()
+        writer.result()
+        raise RuntimeError("writer stopped before the crawl finished")
+    await writer
+    elapsed = time.perf_counter() - start
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"fetched {stats.fetched}, not modified {stats.not_modified}, skipped {stats.skipped}, "
+        f"saved {stats.saved}, missing {stats.missing}, failed {stats.failed}, "
+        f"retries {stats.retries}; {stats.saved / elapsed:.0f} items/s, peak RSS {peak_memory:.0f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    last_id = int(sys.argv[1]) if len(sys.argv) > 1 else 9
+    start = datetime.datetime.now()
+    asyncio.run(main(range(1, last_id + 1)))
+    end = datetime.datetime.now()
+    print(f"Time spent: {end - start}")
@@ -0,0 +1,57 @@
+# Бенчмарк записи в swapi_people: rows/sec для ORM add_all, core insert и COPY
+# Нужен Postgres из docker-compose.yml; таблица очищается перед каждым прогоном
+# Запуск: python bench_writers.py [строк] [размер пачки]
+import asyncio
+import sys
+import time
+
+from sqlalchemy import text
+
+from models import engine, init_orm
+from writers import WRITERS
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+BATCH = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+
+def fake_person(people_id):
+    return {
+        "name": f"Person {people_id}",
+        "height": str(150 + people_id % 60),
+        "mass": str(50 + people_id % 70),
+        "birth_year": f"{people_id % 100}BBY",
+        "homeworld": "https://swapi.dev/api/planets/1/",
+        "films": [f"https://swapi.dev/api/films/{film}/" for film in range(1, people_id % 6 + 2)],
+        "url": f"https://swapi.dev/api/people/{people_id}/",
+    }
+
+
+async def truncate():
+    async with engine.begin() as conn:
+        await conn.execute(text("TRUNCATE swapi_people"))
+
+
+async def run(writer, people, upsert):
+    start = time.perf_counter()
+    for i in range(0, len(people), BATCH):
+        await writer(people[i:i + BATCH], upsert=upsert)
+    return len(people) / (time.perf_counter() - start)
+
+
+async def main():
+    await init_orm()
+    people = [fake_person(people_id) for people_id in range(1, ROWS + 1)]
+    print(f"{ROWS} rows, batches of {BATCH}")
+    print(f"{'method':<8}{'insert rows/s':>15}{'upsert rows/s':>15}")
+    for method, writer in WRITERS.items():
+        await truncate()
+        inserted = await run(writer, people, upsert=False)
+        # upsert поверх уже записанных строк — худший случай, каждая строка конфликтует
+        upserted = "-" if method == "orm" else f"{await run(writer, people, upsert=True):.0f}"
+        print(f"{method:<8}{inserted:>15.0f}{upserted:>15}")
+    await truncate()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+# Локальная заглушка SWAPI для проверки async_requests.py без сети
+# Запуск: python mock_swapi.py, затем SWAPI_URL=http://127.0.0.1:8088/api python async_requests.py 100000
+import asyncio
+import os
+import random
+
+from aiohttp import web
+
+LATENCY = float(os.getenv("MOCK_LATENCY", 0.02))        # средняя задержка ответа, с
+ERROR_RATE = float(os.getenv("MOCK_ERROR_RATE", 0.02))  # доля ответов 429/503
+MISSING_EVERY = int(os.getenv("MOCK_MISSING_EVERY", 17))  # как в SWAPI, некоторых id нет
+# Имитация изменений между запусками: у каждого CHANGE_EVERY-го id версия равна MOCK_VERSION
+VERSION = os.getenv("MOCK_VERSION", "1")
+CHANGE_EVERY = int(os.getenv("MOCK_CHANGE_EVERY", 100))
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+async def get_person(request: web.Request):
+    people_id = int(request.match_info["people_id"])
+    await asyncio.sleep(random.expovariate(1 / LATENCY) if LATENCY else 0)
+    if random.random() < ERROR_RATE:
+        if random.random() < 0.5:
+            return web.json_response({"detail": "Throttled"}, status=429, headers={"Retry-After": "0"})
+        return web.json_response({"detail": "Unavailable"}, status=503)
+    if MISSING_EVERY and people_id % MISSING_EVERY == 0:
+        return web.json_response({"detail": "Not found"}, status=404)
+    version = VERSION if CHANGE_EVERY and people_id % CHANGE_EVERY == 0 else "1"
+    etag = f'"{people_id}-{version}"'
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers={"ETag": etag})
+    return web.json_response({
+        "name": f"Person {people_id}",
+        "height": str(150 + people_id % 60),
+        "mass": str(50 + people_id % 70),
+        "birth_year": f"{people_id % 100}BBY",
+        "homeworld": "https://swapi.dev/api/planets/1/",
+        "films": [f"https://swapi.dev/api/films/{film}/" for film in range(1, people_id % 6 + 2)],
+        "url": f"https://swapi.dev/api/people/{people_id}/",
+        "edited": version,
+    }, headers={"ETag": etag, "Last-Modified": LAST_MODIFIED})
+
+
+app = web.Application()
+app.add_routes([web.get("/api/people/{people_id:\\d+}/", get_person)])
+
+if __name__ == "__main__":
+    web.run_app(app, host="127.0.0.1", port=int(os.getenv("MOCK_PORT", 8088)))
@@ -1,7 +1,8 @@
+import datetime
 import os
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped
-from sqlalchemy import JSON
+from sqlalchemy import JSON, DateTime, Integer, String, func
 
 from dotenv import load_dotenv
 
@@ -25,8 +26,20 @@ class Swapi_people(Base):
     __tablename__ = "swapi_people"
     
     id: Mapped[int] = mapped_column(primary_key=True)
+    # id персонажа в SWAPI (из поля url) — естественный ключ для upsert
+    swapi_id: Mapped[int | None] = mapped_column(Integer, unique=True, nullable=True)
     json: Mapped[JSON] = mapped_column(JSON, nullable=False)
 
+class CrawlState(Base):
+    """Что уже скачано: по нему повторный запуск продолжает с места падения и делает условные запросы."""
+    __tablename__ = "swapi_crawl_state"
+
+    swapi_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False)  # ok | missing
+    etag: Mapped[str | None] = mapped_column(String(256))
+    last_modified: Mapped[str | None] = mapped_column(String(64))
+    updated_at: Mapped[datetime.datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+
 async def init_orm():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
@@ -0,0 +1,113 @@
+# Способы записи пачки персонажей в swapi_people:
+#   orm  — объект Swapi_people на каждую запись и session.add_all (как было)
+#   core — core insert() со списком строк, без ORM-объектов
+#   copy — asyncpg copy_records_to_table (только Postgres)
+# upsert обновляет json у уже сохранённых персонажей по swapi_id вместо вставки дублей
+import json
+import os
+
+from more_itertools import chunked
+from sqlalchemy import func, insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models import CrawlState, Session, Swapi_people
+
+WRITE_METHOD = os.getenv("WRITE_METHOD", "core")
+WRITE_CHUNK_SIZE = int(os.getenv("WRITE_CHUNK_SIZE", 1000))  # строк в одном INSERT/COPY
+UPSERT = os.getenv("UPSERT", "true").lower() in ("1", "true", "yes")
+
+
+def swapi_id(person) -> int | None:
+    url = person.get("url", "")
+    last = url.rstrip("/").rsplit("/", 1)[-1]
+    return int(last) if last.isdigit() else None
+
+
+def to_rows(batch):
+    # Повторы одного персонажа в пачке схлопываются: ON CONFLICT не может обновить строку дважды
+    rows = {}
+    for position, person in enumerate(batch):
+        key = swapi_id(person)
+        rows[key if key is not None else ("no-id", position)] = {"swapi_id": key, "json": person}
+    return list(rows.values())
+
+
+async def write_orm(batch, upsert=False):
+    async with Session() as session:
+        session.add_all([Swapi_people(**row) for row in to_rows(batch)])
+        await session.commit()
+
+
+def core_insert(upsert):
+    if not upsert:
+        return insert(Swapi_people)
+    query = pg_insert(Swapi_people)
+    return query.on_conflict_do_update(index_elements=[Swapi_people.swapi_id], set_={"json": query.excluded.json})
+
+
+async def write_core(batch, upsert=UPSERT):
+    # Один и тот же скомпилированный INSERT со списком параметров: SQLAlchemy сам
+    # собирает из них многострочный VALUES (insertmanyvalues), без ORM-объектов
+    query = core_insert(upsert)
+    async with Session() as session:
+        for rows in chunked(to_rows(batch), WRITE_CHUNK_SIZE):
+            await session.execute(query, rows)
+        await session.commit()
+
+
+async def write_copy(batch, upsert=UPSERT):
+    async with Session() as session:
+        connection = await session.connection()
+        raw = (await connection.get_raw_connection()).driver_connection
+        records = [(row["swapi_id"], json.dumps(row["json"])) for row in to_rows(batch)]
+        if not upsert:
+            for chunk in chunked(records, WRITE_CHUNK_SIZE):
+                await raw.copy_records_to_table("swapi_people", records=chunk, columns=["swapi_id", "json"])
+        else:
+            # COPY не умеет ON CONFLICT: грузим во временную таблицу и переносим одним INSERT ... SELECT
+            await session.execute(text(
+                "CREATE TEMP TABLE IF NOT EXISTS swapi_people_load (swapi_id integer, json json) ON COMMIT DELETE ROWS"
+            ))
+            for chunk in chunked(records, WRITE_CHUNK_SIZE):
+                await raw.copy_records_to_table("swapi_people_load", records=chunk, columns=["swapi_id", "json"])
+            # Повторы уже схлопнуты в to_rows; DISTINCT ON здесь склеил бы все строки без swapi_id в одну
+            await session.execute(text(
+                "INSERT INTO swapi_people (swapi_id, json) "
+                "SELECT swapi_id, json FROM swapi_people_load "
+                "ON CONFLICT (swapi_id) DO UPDATE SET json = EXCLUDED.json"
+            ))
+        await session.commit()
+
+
+async def write_crawl_state(rows):
+    """Отмечает id как обработанные. Пишется после данных: при падении между ними id просто скачается заново."""
+    if not rows:
+        return
+    query = pg_insert(CrawlState)
+    query = query.on_conflict_do_update(
+        index_elements=[CrawlState.swapi_id],
+        set_={
+            "status": query.excluded.status,
+            "etag": query.excluded.etag,
+            "last_modified": query.excluded.last_modified,
+            "updated_at": func.now(),
+        },
+    )
+    async with Session() as session:
+        for chunk in chunked(rows, WRITE_CHUNK_SIZE):
+            await session.execute(query, chunk)
+        await session.commit()
+
+
+WRITERS = {"orm": write_orm, "core": write_core, "copy": write_copy}
+
+
+def get_writer(method=WRITE_METHOD, upsert=UPSERT):
+    writer = WRITERS[method]
+    if method == "orm" and upsert:
+        raise ValueError("ORM writer does not support upsert, use WRITE_METHOD=core or copy")
+
+    async def save(batch):
+        await writer(batch, upsert=upsert)
+
+    return save
@@ -0,0 +1,35 @@
+# Пакетная отправка задач: group вместо серии .delay(), результаты по мере готовности, chord для свёртки
+import time
+
+from celery import chord, group
+
+POLL_INTERVAL = 0.01
+
+
+def dispatch(task, args_list, **options):
+    """Отправляет задачу для каждого набора аргументов одной группой, возвращает GroupResult."""
+    return group(task.s(*args) for args in args_list).apply_async(**options)
+
+
+def as_completed(group_result, timeout=None, interval=POLL_INTERVAL):
+    """Отдаёт (номер, результат) в порядке завершения задач, а не в порядке отправки.
+
+    Ошибка задачи пробрасывается, как только эта задача завершилась.
+    Опрос backend-а подходит любому backend-у, включая file:// и cache+memory://.
+    """
+    pending = dict(enumerate(group_result.results))
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while pending:
+        for index, result in list(pending.items()):
+            if result.ready():
+                del pending[index]
+                yield index, result.get(propagate=True, disable_sync_subtasks=False)
+        if pending:
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"{len(pending)} tasks are not finished")
+            time.sleep(interval)
+
+
+def map_reduce(task, args_list, callback, **options):
+    """chord: задачи выполняются параллельно, callback получает список их результатов одной задачей."""
+    return chord(task.s(*args) for args in args_list)(callback.s(), **options)
@@ -1,14 +1,21 @@
 import datetime
-from tasks import cpu_bound
+from batch import as_completed, dispatch, map_reduce
+from tasks import cpu_bound, total
+
+ARGS = [(1, 2), (1, 3), (1, 4), (1, 5)]
+
 
 def main():
-    async_result_1 = cpu_bound.delay(1, 2)
-    async_result_2 = cpu_bound.delay(1, 3)
-    async_result_3 = cpu_bound.delay(1, 4)
-    async_result_4 = cpu_bound.delay(1, 5)
-    print( async_result_1.get() , async_result_2.get() , async_result_3.get() , async_result_4.get())
-
-start = datetime.datetime.now()
-main()
-end = datetime.datetime.now()
-print(f"Time spent: {end - start}")
\ No newline at end of file
+    # Все четыре задачи уходят одной группой, результаты печатаются по мере готовности
+    group_result = dispatch(cpu_bound, ARGS)
+    for index, result in as_completed(group_result):
+        print(f"cpu_bound{ARGS[index]} = {result}")
+    # То же через chord: сумму считает задача total на воркере
+    print("total:", map_reduce(cpu_bound, ARGS, total).get())
+
+
+if __name__ == "__main__":
+    start = datetime.datetime.now()
+    main()
+    end = datetime.datetime.now()
+    print(f"Time spent: {end - start}")
@@ -1,10 +1,14 @@
+import hashlib
+import os
 import time
 import celery
 
+# Без Redis: CELERY_BROKER_URL=memory:// и CELERY_RESULT_BACKEND=file:///tmp/celery-results
+# (воркер тогда должен работать в том же процессе, что и отправитель, см. bench_pools.py)
 app = celery.Celery(
-    broker="redis://127.0.0.1:6379/0", 
-    backend="redis://127.0.0.1:6379/1",
-    broker_connection_retry_on_startup=True 
+    broker=os.getenv("CELERY_BROKER_URL", "redis://127.0.0.1:6379/0"),
+    backend=os.getenv("CELERY_RESULT_BACKEND", "redis://127.0.0.1:6379/1"),
+    broker_connection_retry_on_startup=True
 )
 
 app.conf.update(
@@ -19,7 +23,25 @@ app.conf.update(
     worker_max_tasks_per_child=1000,
 )
 
+CPU_WORK = int(os.getenv("CPU_WORK", 200_000))  # раундов sha256 на одну задачу cpu_bound
+IO_WAIT = float(os.getenv("IO_WAIT", 0.5))
+
+
 @app.task(name="cpu_bound")
-def cpu_bound(a, b):
-    time.sleep(0.5)
+def cpu_bound(a, b, work=CPU_WORK):
+    # Настоящая работа процессора вместо sleep: под GIL потоки её не распараллелят, процессы — да
+    digest = b""
+    for _ in range(work):
+        digest = hashlib.sha256(digest).digest()
     return a + b
+
+
+@app.task(name="io_bound")
+def io_bound(a, b, wait=IO_WAIT):
+    time.sleep(wait)
+    return a + b
+
+
+@app.task(name="total")
+def total(results):
+    return sum(results)
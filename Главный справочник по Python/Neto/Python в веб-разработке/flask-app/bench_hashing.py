@@ -0,0 +1,81 @@
+# Бенчмарк хэширования паролей: hashes/sec и p99 латентность POST/PATCH /user/
+# Нужна запущенная база из docker-compose.yml
+# Запуск: python bench_hashing.py
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import hashing
+import server
+
+POOL_SIZES = [1, 2, 4, 8]
+ROUNDS = [10, 12]
+CONCURRENCY = 16
+REQUESTS = 64
+
+
+def p99(latencies):
+    return statistics.quantiles(latencies, n=100, method="inclusive")[98]
+
+
+def bench_hashes(hasher):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        list(pool.map(lambda _: hasher.hash(b"benchmark-password"), range(REQUESTS)))
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def timed(call):
+    start = time.perf_counter()
+    response = call()
+    return time.perf_counter() - start, response.status_code
+
+
+def bench_requests(client):
+    names = [f"bench_{uuid.uuid4().hex[:12]}" for _ in range(REQUESTS)]
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        results = list(pool.map(
+            lambda name: timed(lambda: client.post("/user/", json={"name": name, "password": "benchmark-password"})),
+            names,
+        ))
+    post = [latency for latency, _ in results]
+    post_errors = sum(1 for _, status in results if status != 201)
+
+    with server.Session() as session:
+        ids = [user.id for user in session.query(server.User).filter(server.User.name.in_(names))]
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        results = list(pool.map(
+            lambda user_id: timed(lambda: client.patch(f"/user/{user_id}/", json={"password": "new-benchmark-password"})),
+            ids,
+        ))
+    patch = [latency for latency, _ in results]
+    patch_errors = sum(1 for _, status in results if status != 200)
+
+    with server.Session() as session:
+        session.query(server.User).filter(server.User.name.in_(names)).delete()
+        session.commit()
+    return post, post_errors, patch, patch_errors
+
+
+def main():
+    client = server.app.test_client()
+    print(f"{'backend':<8}{'pool':>6}{'rounds':>8}{'hash/s':>10}{'post p99':>12}{'patch p99':>12}{'503':>6}")
+    configs = [("sync", 1, rounds) for rounds in ROUNDS]
+    configs += [("pool", size, rounds) for size in POOL_SIZES for rounds in ROUNDS]
+    for backend, size, rounds in configs:
+        hasher = hashing.make_hasher(backend, pool_size=size, rounds=rounds)
+        server.hasher = hasher
+        try:
+            rate = bench_hashes(hasher)
+            post, post_errors, patch, patch_errors = bench_requests(client)
+        finally:
+            hasher.shutdown()
+        print(
+            f"{backend:<8}{size:>6}{rounds:>8}{rate:>10.1f}"
+            f"{p99(post) * 1000:>10.1f}ms{p99(patch) * 1000:>10.1f}ms{post_errors + patch_errors:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
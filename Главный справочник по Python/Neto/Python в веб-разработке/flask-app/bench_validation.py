@@ -0,0 +1,38 @@
+# Микробенчмарк валидации тела запроса: старый путь (request.json -> dict -> schema(**data).dict())
+# против TypeAdapter.validate_json прямо по байтам тела
+# Запуск: python bench_validation.py
+import json
+import timeit
+import warnings
+
+from schema import CreateUser, UpdateUser, get_adapter
+
+PAYLOADS = {
+    "create": (CreateUser, json.dumps({"name": "ivan.petrov_1987", "password": "correct horse battery staple"}).encode()),
+    "update name": (UpdateUser, json.dumps({"name": "ivan.petrov_1988"}).encode()),
+    "update both": (UpdateUser, json.dumps({"name": "ivan.petrov_1989", "password": "another-long-password"}).encode()),
+}
+NUMBER = 20000
+
+
+def old_validate(schema, body: bytes):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return schema(**json.loads(body)).dict(exclude_unset=True)
+
+
+def new_validate(schema, body: bytes):
+    return get_adapter(schema).validate_json(body).model_dump(exclude_unset=True)
+
+
+def main():
+    print(f"{'payload':<14}{'old, us':>10}{'new, us':>10}{'speedup':>10}")
+    for name, (schema, body) in PAYLOADS.items():
+        assert old_validate(schema, body) == new_validate(schema, body)
+        old = timeit.timeit(lambda: old_validate(schema, body), number=NUMBER) / NUMBER * 1e6
+        new = timeit.timeit(lambda: new_validate(schema, body), number=NUMBER) / NUMBER * 1e6
+        print(f"{name:<14}{old:>10.2f}{new:>10.2f}{old / new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
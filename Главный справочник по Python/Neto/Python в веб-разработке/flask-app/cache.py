@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 60))
+
+
+class AbstractCache(ABC):
+    """Интерфейс кэша. Локальная реализация ниже, общую (например, Redis) можно подключить так же."""
+
+    @abstractmethod
+    def get(self, key):
+        """Возвращает значение или None."""
+
+    @abstractmethod
+    def generation(self, key):
+        """Метка версии ключа; берётся до чтения из базы и передаётся в set."""
+
+    @abstractmethod
+    def set(self, key, value, generation=None):
+        """Сохраняет значение; если generation устарела (ключ удаляли после чтения), ничего не делает."""
+
+    @abstractmethod
+    def delete(self, key):
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict:
+        pass
+
+
+class LocalCache(AbstractCache):
+    """LRU + TTL кэш в памяти процесса."""
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        # Номер удаления по ключу. Таблица ограничена maxsize: при переполнении она очищается,
+        # а epoch растёт — все выданные до этого метки разом становятся устаревшими
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                self.evictions += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def generation(self, key):
+        with self._lock:
+            return self._epoch, self._generations.get(key, 0)
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            # Чтение из базы началось до delete: значение могло устареть, не кладём его
+            if generation is not None and generation != (self._epoch, self._generations.get(key, 0)):
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            if len(self._generations) >= self.maxsize:
+                self._generations.clear()
+                self._epoch += 1
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,108 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+import bcrypt
+
+HASH_BACKEND = os.getenv("HASH_BACKEND", "pool")
+HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", os.cpu_count() or 1))
+HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", HASH_POOL_SIZE * 4))
+HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", 10))
+HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", 1))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+
+class HasherBusy(Exception):
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+
+
+# Функции уровня модуля, чтобы их можно было передать в процессы пула
+def _hash(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check(password: bytes, hashed_password: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed_password)
+
+
+class SyncHasher:
+    """Хэширует прямо в потоке запроса."""
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS):
+        self.rounds = rounds
+
+    def hash(self, password: bytes) -> bytes:
+        return _hash(password, self.rounds)
+
+    def check(self, password: bytes, hashed_password: bytes) -> bool:
+        return _check(password, hashed_password)
+
+    def hash_many(self, passwords: list[bytes]) -> list[bytes]:
+        return [self.hash(password) for password in passwords]
+
+    def shutdown(self):
+        pass
+
+
+class PoolHasher:
+    """Хэширует в ограниченном пуле процессов.
+
+    Одновременно в пуле может находиться не больше pool_size + queue_depth задач,
+    остальные сразу получают HasherBusy, а не ждут в очереди.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = HASH_POOL_SIZE,
+        queue_depth: int = HASH_QUEUE_DEPTH,
+        rounds: int = BCRYPT_ROUNDS,
+        timeout: float = HASH_TIMEOUT,
+        retry_after: int = HASH_RETRY_AFTER,
+    ):
+        self.rounds = rounds
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._executor = ProcessPoolExecutor(max_workers=pool_size)
+        self._slots = threading.BoundedSemaphore(pool_size + queue_depth)
+
+    def _submit(self, func, *args, blocking=False):
+        if not self._slots.acquire(blocking=blocking, timeout=self.timeout if blocking else None):
+            raise HasherBusy(self.retry_after)
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _result(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HasherBusy(self.retry_after)
+
+    def _run(self, func, *args):
+        return self._result(self._submit(func, *args))
+
+    def hash(self, password: bytes) -> bytes:
+        return self._run(_hash, password, self.rounds)
+
+    def check(self, password: bytes, hashed_password: bytes) -> bool:
+        return self._run(_check, password, hashed_password)
+
+    def hash_many(self, passwords: list[bytes]) -> list[bytes]:
+        # Пачка не отклоняется целиком: ждём освобождения слотов, пока не истечёт timeout
+        futures = [self._submit(_hash, password, self.rounds, blocking=True) for password in passwords]
+        return [self._result(future) for future in futures]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def make_hasher(backend: str = HASH_BACKEND, **kwargs):
+    if backend == "sync":
+        return SyncHasher(rounds=kwargs.get("rounds", BCRYPT_ROUNDS))
+    if backend == "pool":
+        return PoolHasher(**kwargs)
+    raise ValueError(f"Unknown hash backend: {backend}")
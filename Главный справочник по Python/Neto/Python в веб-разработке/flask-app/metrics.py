@@ -0,0 +1,40 @@
+import statistics
+import threading
+from collections import deque
+
+
+class LatencyStats:
+    """Счётчик латентности: общее число, среднее и перцентили по последним window замерам."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._recent.append(seconds)
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = list(self._recent)
+            count, total, maximum = self.count, self.total, self.max
+        result = {
+            "count": count,
+            "avg_ms": total / count * 1000 if count else 0.0,
+            "max_ms": maximum * 1000,
+            "p50_ms": 0.0,
+            "p99_ms": 0.0,
+        }
+        if len(recent) > 1:
+            quantiles = statistics.quantiles(recent, n=100, method="inclusive")
+            result["p50_ms"] = quantiles[49] * 1000
+            result["p99_ms"] = quantiles[98] * 1000
+        elif recent:
+            result["p50_ms"] = result["p99_ms"] = recent[0] * 1000
+        return result
@@ -2,7 +2,7 @@ import atexit
 import datetime
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, String, DateTime, Integer, func
+from sqlalchemy import create_engine, String, DateTime, Integer, Index, func
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, mapped_column, Mapped
 
 load_dotenv()
@@ -13,6 +13,14 @@ POSTGRES_DB = os.getenv("POSTGRES_DB")
 POSTGRES_HOST = os.getenv("POSTGRES_HOST")
 POSTGRES_PORT = int(os.getenv("POSTGRES_PORT", 5432))
 
+# Настройки пула соединений. Итоговый максимум на процесс: DB_POOL_SIZE + DB_MAX_OVERFLOW,
+# умноженный на число воркеров, должен укладываться в max_connections Postgres
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
 required_vars = ["POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB", "POSTGRES_HOST"]
 for var in required_vars:
     if not os.getenv(var):
@@ -20,7 +28,14 @@ for var in required_vars:
 
 PG_DSN = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
-engine = create_engine(PG_DSN)
+engine = create_engine(
+    PG_DSN,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
 atexit.register(lambda: engine.dispose())
 
 Session = sessionmaker(bind=engine)
@@ -30,6 +45,19 @@ class Base(DeclarativeBase):
 
 class User(Base):
     __tablename__ = "app_users"
+    __table_args__ = (
+        # Индекс под keyset-пагинацию по (registered_time, id); name в INCLUDE,
+        # чтобы список пользователей отдавался index-only scan'ом
+        Index(
+            "ix_app_users_registered_time_id",
+            "registered_time",
+            "id",
+            postgresql_include=["name"],
+        ),
+    )
+
+    # Поля, которые можно отдавать наружу (без пароля)
+    public_fields = ("id", "name", "registered_time")
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(100), unique=True, index=True, nullable=False)
@@ -41,7 +69,7 @@ class User(Base):
         return {
             "id": self.id,
             "name": self.name,
-            "registered_time": self.registered_time.isoformat(),
+            "registered_time": self.registered_time,
         }
 
 Base.metadata.create_all(bind=engine)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Optional
+from functools import cache
 import pydantic
 from abc import ABC
 
@@ -6,8 +6,8 @@ class AbstractUser (pydantic.BaseModel, ABC):
     name: str
     password: str
     
-    @classmethod
     @pydantic.field_validator("password")
+    @classmethod
     def secure_password(cls, v: str):
         if len(v) < 8:
             raise ValueError("Password must be at least 8 characters long")
@@ -18,5 +18,13 @@ class CreateUser (AbstractUser):
     name: str
     password: str
 class UpdateUser (AbstractUser):
-    name: Optional[str]
-    password: Optional[str]
\ No newline at end of file
+    # Поле можно не передавать, но null не проходит: колонки NOT NULL.
+    # Значение по умолчанию не валидируется и в model_dump(exclude_unset=True) не попадает
+    name: str = None
+    password: str = None
+
+
+@cache
+def get_adapter(schema) -> pydantic.TypeAdapter:
+    # TypeAdapter строится один раз на схему, а не на каждый запрос
+    return pydantic.TypeAdapter(schema)
@@ -1,82 +1,152 @@
+import base64
+import binascii
+import datetime
+import os
+import time
+import zlib
 import flask
 from flask import request
+from flask.json.provider import JSONProvider
 from flask.views import MethodView
-from models import User, Session
+from models import User, Session, engine, DB_MAX_OVERFLOW
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 import traceback
-from schema import UpdateUser, CreateUser
-from flask_bcrypt import Bcrypt
+import pydantic
+from schema import UpdateUser, CreateUser, get_adapter
+from hashing import make_hasher, HasherBusy
+from cache import LocalCache
+from metrics import LatencyStats
+import serializer
+
+class FastJSONProvider(JSONProvider):
+    """Все jsonify и request.json идут через serializer (orjson/msgspec, если установлены)."""
+
+    def dumps(self, obj, **kwargs):
+        return serializer.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return serializer.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(serializer.dumps(obj), mimetype="application/json")
 
 app = flask.Flask("app")
+app.json = FastJSONProvider(app)
+
+hasher = make_hasher()
+
+user_cache = LocalCache()
+
+checkout_latency = LatencyStats()
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 1000))
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", 50))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", 500))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+
+class HttpError(Exception):
+    def __init__(self, status_code, message, headers=None):
+        self.status_code = status_code
+        self.message = message
+        self.headers = headers or {}
 
-bcrypt = Bcrypt(app)
+def hasher_busy(e: HasherBusy):
+    return HttpError(status_code=503, message="Server is busy, try again later",
+                     headers={"Retry-After": str(e.retry_after)})
 
 def hash_password(password: str):
     password = password.encode()
-    password = bcrypt.generate_password_hash(password)
+    try:
+        password = hasher.hash(password)
+    except HasherBusy as e:
+        raise hasher_busy(e)
     password = password.decode()
     return password
 
 def check_password(password: str, hashed_password: str) -> bool:
     password = password.encode()
     hashed_password = hashed_password.encode()
-    return bcrypt.check_password_hash(hashed_password, password)
-    
-
-class HttpError(Exception):
-    def __init__(self, status_code, message):
-        self.status_code = status_code
-        self.message = message
+    try:
+        return hasher.check(password, hashed_password)
+    except HasherBusy as e:
+        raise hasher_busy(e)
 
-@app.before_request
-def before_request():
-    session = Session()
-    request.session = session
+def get_session():
+    # Сессия и соединение из пула берутся только при первом обращении к базе
+    if "session" not in flask.g:
+        session = Session()
+        start = time.perf_counter()
+        session.connection()
+        checkout_latency.observe(time.perf_counter() - start)
+        flask.g.session = session
+    return flask.g.session
 
-@app.after_request
-def after_request(response: flask.Response):
-    request.session.close()
-    return response
+@app.teardown_request
+def teardown_request(exc):
+    session = flask.g.pop("session", None)
+    if session is not None:
+        session.close()
 
 @app.errorhandler(HttpError)
 def error_handler(err: HttpError):
     json_response = flask.jsonify({"status": "error", "message": err.message})
     json_response.status_code = err.status_code
+    json_response.headers.update(err.headers)
     return json_response
 
 def get_user(user_id):
-    user = request.session.get(User, user_id)
+    user = get_session().get(User, user_id)
     if user is None:
         raise HttpError(status_code=404, message="User not found")
     return user
 
 def add_user(user_data):
+    session = get_session()
     try:
         user = User(**user_data)
-        request.session.add(user)
-        request.session.commit()
+        session.add(user)
+        session.commit()
         return user
     except IntegrityError:
-        request.session.rollback()
+        session.rollback()
         raise HttpError(status_code=409, message="User already exists")
 
+def validation_error(e: pydantic.ValidationError):
+    error = e.errors(include_url=False)[0]
+    error.pop("ctx", None)
+    error.pop("input", None)
+    return HttpError(status_code=400, message=error)
+
 def validate(schema, json_data):
     try:
-        return schema(**json_data).dict(exclude_unset=True)
-    except ValueError as e:
-        error = e.errors()[0]
-        error.pop("ctx", None)
-        raise HttpError(status_code=400, message=error)
+        return get_adapter(schema).validate_python(json_data).model_dump(exclude_unset=True)
+    except pydantic.ValidationError as e:
+        raise validation_error(e)
+
+def validate_body(schema):
+    # JSON разбирается pydantic прямо из байтов тела, без request.json и промежуточного dict
+    try:
+        return get_adapter(schema).validate_json(request.get_data()).model_dump(exclude_unset=True)
+    except pydantic.ValidationError as e:
+        raise validation_error(e)
 
 class UserView(MethodView):
     def get(self, user_id: int):
-        user = get_user(user_id)
-        return flask.jsonify(user.dict)
+        user_dict = user_cache.get(user_id)
+        if user_dict is None:
+            # Метка берётся до запроса: если PATCH/DELETE успеет сбросить ключ, старые данные в кэш не попадут
+            generation = user_cache.generation(user_id)
+            user_dict = get_user(user_id).dict
+            user_cache.set(user_id, user_dict, generation)
+        return flask.jsonify(user_dict)
 
     def post(self):
         try:
-            user_data = request.json
-            user_data = validate(CreateUser, user_data)
+            user_data = validate_body(CreateUser)
             user_data["password"] = hash_password(user_data["password"])
             user = add_user(user_data)
             return flask.jsonify(user.dict), 201
@@ -88,25 +158,220 @@ class UserView(MethodView):
             raise HttpError(status_code=500, message=f"Server error: {str(e)}")
 
     def patch(self, user_id: int):
-         user_data = request.json
-         user_data = validate(UpdateUser, user_data)
+         user_data = validate_body(UpdateUser)
          if "password" in user_data:
              user_data["password"] = hash_password(user_data["password"])
          user = get_user(user_id)
          for field, value in user_data.items():
              setattr(user, field, value)
-         request.session.commit()
+         get_session().commit()
+         user_cache.delete(user_id)
          return user.dict
 
     def delete(self, user_id: int):
         user = get_user(user_id)
-        request.session.delete(user)
-        request.session.commit()
+        get_session().delete(user)
+        get_session().commit()
+        user_cache.delete(user_id)
         return flask.jsonify({"status": "deleted"})
 
+def encode_cursor(registered_time: datetime.datetime, user_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{registered_time.isoformat()},{user_id}".encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        registered_time, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(",")
+        return datetime.datetime.fromisoformat(registered_time), int(user_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HttpError(status_code=400, message="Invalid cursor")
+
+def parse_fields(fields: str | None) -> list[str]:
+    if not fields:
+        return list(User.public_fields)
+    fields = list(dict.fromkeys(field.strip() for field in fields.split(",")))
+    unknown = [field for field in fields if field not in User.public_fields]
+    if unknown:
+        raise HttpError(status_code=400, message=f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def list_users():
+    try:
+        limit = int(request.args.get("limit", PAGE_SIZE))
+    except ValueError:
+        raise HttpError(status_code=400, message="'limit' must be an integer")
+    limit = max(1, min(limit, PAGE_SIZE_MAX))
+    fields = parse_fields(request.args.get("fields"))
+
+    # Колонки курсора выбираются всегда, остальные — только запрошенные
+    columns = [User.registered_time, User.id] + [
+        getattr(User, field) for field in fields if field not in ("registered_time", "id")
+    ]
+    query = select(*columns).order_by(User.registered_time, User.id).limit(limit + 1)
+    cursor = request.args.get("cursor")
+    if cursor:
+        query = query.where(tuple_(User.registered_time, User.id) > decode_cursor(cursor))
+    rows = get_session().execute(query).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    users = []
+    for row in rows:
+        row = row._asdict()
+        users.append({field: row[field] for field in fields})
+    next_cursor = encode_cursor(rows[-1].registered_time, rows[-1].id) if has_more else None
+    return flask.jsonify({"users": users, "next_cursor": next_cursor})
+
+def export_rows(since: datetime.datetime | None, after_id: int | None):
+    # Своя сессия: генератор дочитывается уже после teardown_request
+    with Session() as session:
+        query = select(User.id, User.name, User.registered_time).order_by(User.registered_time, User.id)
+        # registered_time не уникален, поэтому продолжение — по паре (registered_time, id), как курсор list_users.
+        # Один since включает границу: строки с тем же временем не теряются
+        if since is not None and after_id is not None:
+            query = query.where(tuple_(User.registered_time, User.id) > (since, after_id))
+        elif since is not None:
+            query = query.where(User.registered_time >= since)
+        # yield_per включает серверный курсор: в памяти одновременно не больше одной пачки строк
+        result = session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for rows in result.partitions():
+            yield b"".join(serializer.dumps(row._asdict()) + b"\n" for row in rows)
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.route("/users/export")
+def export_users():
+    since = request.args.get("since")
+    if since:
+        try:
+            since = datetime.datetime.fromisoformat(since)
+        except ValueError:
+            raise HttpError(status_code=400, message="'since' must be an ISO 8601 datetime")
+    after_id = request.args.get("after_id")
+    if after_id:
+        if not since:
+            raise HttpError(status_code=400, message="'after_id' requires 'since'")
+        try:
+            after_id = int(after_id)
+        except ValueError:
+            raise HttpError(status_code=400, message="'after_id' must be an integer")
+    chunks = export_rows(since or None, after_id or None)
+    headers = {"Vary": "Accept-Encoding"}
+    # "gzip;q=0" — явный отказ от gzip, поэтому смотрим на вес, а не на наличие в заголовке
+    if request.accept_encodings["gzip"] > 0:
+        chunks = gzip_stream(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return flask.Response(chunks, mimetype="application/x-ndjson", headers=headers)
+
+class UsersView(MethodView):
+    def get(self):
+        ids = request.args.get("ids")
+        if not ids:
+            return list_users()
+        try:
+            ids = list(dict.fromkeys(int(user_id) for user_id in ids.split(",")))
+        except ValueError:
+            raise HttpError(status_code=400, message="'ids' must be a comma-separated list of integers")
+        if len(ids) > BULK_MAX_ITEMS:
+            raise HttpError(status_code=400, message=f"No more than {BULK_MAX_ITEMS} ids per request")
+        users = get_session().scalars(select(User).where(User.id.in_(ids))).all()
+        found = {user.id: user.dict for user in users}
+        return flask.jsonify({
+            "users": [found[user_id] for user_id in ids if user_id in found],
+            "missing": [user_id for user_id in ids if user_id not in found],
+        })
+
+    def post(self):
+        items = request.json
+        if not isinstance(items, list):
+            raise HttpError(status_code=400, message="Expected a JSON array of users")
+        if len(items) > BULK_MAX_ITEMS:
+            raise HttpError(status_code=400, message=f"No more than {BULK_MAX_ITEMS} users per request")
+
+        results = [None] * len(items)
+        valid = {}
+        names = set()
+        for index, item in enumerate(items):
+            try:
+                user_data = validate(CreateUser, item if isinstance(item, dict) else {})
+            except HttpError as e:
+                results[index] = {"index": index, "status": "invalid", "message": e.message}
+                continue
+            if user_data["name"] in names:
+                results[index] = {"index": index, "status": "conflict", "message": "Duplicate name in request"}
+                continue
+            names.add(user_data["name"])
+            valid[index] = user_data
+
+        session = get_session()
+        existing = set(session.scalars(
+            select(User.name).where(User.name.in_(names))
+        ))
+        # Завершаем читающую транзакцию до bcrypt: иначе соединение простаивало бы взятым из пула,
+        # пока хэшируется вся пачка. Для вставки сессия возьмёт соединение заново
+        session.rollback()
+        for index in [index for index, user_data in valid.items() if user_data["name"] in existing]:
+            results[index] = {"index": index, "status": "conflict", "message": "User already exists"}
+            del valid[index]
+
+        try:
+            hashed = hasher.hash_many([user_data["password"].encode() for user_data in valid.values()])
+        except HasherBusy as e:
+            raise hasher_busy(e)
+
+        # Одна вставка на всю пачку: строки, чьё имя успели занять, Postgres пропустит и не вернёт в RETURNING
+        created = {}
+        if valid:
+            query = (
+                pg_insert(User)
+                .values([{**user_data, "password": password.decode()}
+                         for user_data, password in zip(valid.values(), hashed)])
+                .on_conflict_do_nothing(index_elements=[User.name])
+                .returning(User.id, User.name, User.registered_time)
+            )
+            rows = {row.name: row._asdict() for row in session.execute(query)}
+            session.commit()
+            for index, user_data in valid.items():
+                if user_data["name"] in rows:
+                    created[index] = rows[user_data["name"]]
+                else:
+                    results[index] = {"index": index, "status": "conflict", "message": "User already exists"}
+
+        for index, user in created.items():
+            results[index] = {"index": index, "status": "created", "user": user}
+        status_code = 201 if len(created) == len(items) else 207
+        return flask.jsonify(results), status_code
+
+@app.route("/cache/stats/")
+def cache_stats():
+    return flask.jsonify(user_cache.stats())
+
+@app.route("/metrics")
+def metrics():
+    pool = engine.pool
+    return flask.jsonify({
+        "pool": {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_connections": pool.size() + DB_MAX_OVERFLOW,
+        },
+        "checkout_latency": checkout_latency.snapshot(),
+        "user_cache": user_cache.stats(),
+    })
+
 user_view = UserView.as_view("user")
 app.add_url_rule("/user/", methods=["POST"], view_func=user_view)
 app.add_url_rule("/user/<int:user_id>/", methods=["GET", "PATCH", "DELETE"], view_func=user_view)
+users_view = UsersView.as_view("users")
+app.add_url_rule("/users/", methods=["GET"], view_func=users_view, strict_slashes=False)
+app.add_url_rule("/users/bulk", methods=["POST"], view_func=users_view)
 
 if __name__ == "__main__":
     app.run(host='127.0.0.1', port=9999, debug=True)
\ No newline at end of file
@@ -1,6 +1,15 @@
 from urllib.parse import urlencode
+import asyncio
+import json
+import os
 import secrets
+import threading
+import time
+
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 id = "53859342"
 
@@ -16,47 +25,232 @@ params = {
 }
 
 oauth_url = f"{OAUTH_BASE_URL}?{urlencode(params)}"
-print(oauth_url)
 
 TOKEN = "1"
 
+# Лимит VK для пользовательского токена — 3 запроса в секунду
+VK_RPS = float(os.getenv("VK_RPS", 3))
+VK_POOL_SIZE = int(os.getenv("VK_POOL_SIZE", 10))
+VK_MAX_RETRIES = int(os.getenv("VK_MAX_RETRIES", 3))
+EXECUTE_LIMIT = 25  # больше 25 вызовов API в одном execute VK не принимает
+TOO_MANY_REQUESTS = 6
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class VkApiError(Exception):
+    def __init__(self, error):
+        self.code = error.get("error_code")
+        self.message = error.get("error_msg")
+        super().__init__(f"{self.code}: {self.message}")
+
+
+class TokenBucket:
+    """Не больше rate запросов в секунду, с запасом burst на короткие всплески."""
+
+    def __init__(self, rate=VK_RPS, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _take(self):
+        # Возвращает, сколько ждать до появления жетона; 0 — жетон взят
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                delay = self._take()
+            if not delay:
+                return
+            time.sleep(delay)
+
+
+class AsyncTokenBucket(TokenBucket):
+    def __init__(self, rate=VK_RPS, burst=None):
+        super().__init__(rate, burst)
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        while True:
+            async with self.lock:
+                delay = self._take()
+            if not delay:
+                return
+            await asyncio.sleep(delay)
+
+
+def execute_code(calls):
+    # calls — список (метод, параметры); VKScript понимает JSON-литералы объектов
+    items = ", ".join(f"API.{method}({json.dumps(call_params, ensure_ascii=False)})" for method, call_params in calls)
+    return f"return [{items}];"
+
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def is_read_only(method):
+    # status.get, photos.get, users.get... Повтор execute или status.set может выполнить действие дважды
+    return method.rsplit(".", 1)[-1].startswith("get")
+
+
+def retryable(method, status=None, sent=True):
+    """Общая политика обоих клиентов: запрос, который не ушёл, и 429 повторяются всегда,
+    5xx и оборванный ответ — только для методов чтения."""
+    if not sent or status == 429:
+        return True
+    return is_read_only(method) and (status is None or status in RETRY_STATUSES)
+
+
+def backoff(attempt, rate):
+    return 2 ** attempt / rate
+
+
 class VK_API_CLIENT:
     API_BASIC_URL = "https://api.vk.com/method"
-    def __int__(self, token, user_id):
+
+    def __init__(self, token, user_id, rate=VK_RPS):
         self.token = token
         self.user_id = user_id
-        
+        self.limiter = TokenBucket(rate)
+        # Одна сессия на клиента: keep-alive и пул соединений вместо нового TCP+TLS на каждый вызов.
+        # urllib3 повторяет только ошибки установки соединения — запрос до VK не дошёл, и POST повторять безопасно.
+        # Остальное (429, 5xx, обрыв ответа, ошибка VK 6) повторяет call через limiter, по политике retryable
+        self.session = requests.Session()
+        retry = Retry(total=VK_MAX_RETRIES, connect=VK_MAX_RETRIES, read=0, status=0, other=0,
+                      backoff_factor=0.5, allowed_methods=None)
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=VK_POOL_SIZE, max_retries=retry))
+
     def get_common_params(self):
         return {
             "access_token": self.token,
             "v": "5.199",
         }
-        
-    def get_status(self):
+
+    def call(self, method, **method_params):
         params = self.get_common_params()
-        params.update({"user_id": self.user_id})
-        res = requests.get(f"{self.API_BASIC_URL}/status.get", params=params)
-        return res.json().get("response", {}).get("text")
-    
+        params.update(method_params)
+        for attempt in range(VK_MAX_RETRIES + 1):
+            self.limiter.acquire()
+            last = attempt == VK_MAX_RETRIES
+            try:
+                res = self.session.post(f"{self.API_BASIC_URL}/{method}", data=params)
+            except (requests.ConnectionError, requests.Timeout):
+                if last or not retryable(method):
+                    raise
+                time.sleep(backoff(attempt, self.limiter.rate))
+                continue
+            if res.status_code >= 400:
+                if last or not retryable(method, res.status_code):
+                    res.raise_for_status()
+                time.sleep(backoff(attempt, self.limiter.rate))
+                continue
+            data = res.json()
+            if "error" not in data:
+                return data["response"]
+            if data["error"].get("error_code") != TOO_MANY_REQUESTS or last:
+                raise VkApiError(data["error"])
+            time.sleep(backoff(attempt, self.limiter.rate))
+
+    def execute(self, calls):
+        """Выполняет список (метод, параметры) пачками по 25 вызовов в одном запросе execute.
+
+        Результаты возвращаются в порядке calls; на месте упавшего вызова — False, как отдаёт VK.
+        """
+        results = []
+        for batch in chunked(list(calls), EXECUTE_LIMIT):
+            results.extend(self.call("execute", code=execute_code(batch)))
+        return results
+
+    def get_status(self):
+        return self.call("status.get", user_id=self.user_id).get("text")
+
+    def get_statuses(self, user_ids):
+        return dict(zip(user_ids, self.execute([("status.get", {"user_id": user_id}) for user_id in user_ids])))
+
     def set_status(self, new_stats):
-        params = self.get_common_params()
-        params.update({"user_id": self.user_id, "text": new_stats})
-        res = requests.get(f"{self.API_BASIC_URL}/status.get", params=params)
-        res.raise_for_status()
-        
+        self.call("status.set", text=new_stats)
+
     def replace_status(self, target, replace_string):
         status = self.get_status()
         new_status = status.replace(target, replace_string)
         self.set_status(new_status)
-        
+
     def get_profile_photos(self):
-        params = self.get_common_params()
-        params.update({"owner_id": self.user_id, "album_id": "profile"})
-        res = requests.get(f"{self.API_BASIC_URL}/photos.get", params=params)
-        return res.json()
-        
-        
+        return self.call("photos.get", owner_id=self.user_id, album_id="profile")
+
+    def close(self):
+        self.session.close()
+
+
+class ASYNC_VK_API_CLIENT:
+    """Асинхронный вариант для обхода большого числа user_id: пачки execute уходят параллельно,
+    общий темп ограничен тем же token bucket."""
+
+    API_BASIC_URL = VK_API_CLIENT.API_BASIC_URL
+
+    def __init__(self, token, rate=VK_RPS):
+        self.token = token
+        self.limiter = AsyncTokenBucket(rate)
+        self.session = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=VK_POOL_SIZE))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def call(self, method, **method_params):
+        params = {"access_token": self.token, "v": "5.199"}
+        params.update(method_params)
+        for attempt in range(VK_MAX_RETRIES + 1):
+            await self.limiter.acquire()
+            last = attempt == VK_MAX_RETRIES
+            data = None
+            try:
+                async with self.session.post(f"{self.API_BASIC_URL}/{method}", data=params) as res:
+                    if res.status < 400:
+                        data = await res.json(content_type=None)
+                    elif last or not retryable(method, res.status):
+                        res.raise_for_status()
+            except aiohttp.ClientConnectorError:
+                # Соединение не установилось, запрос не ушёл
+                if last:
+                    raise
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last or not retryable(method):
+                    raise
+            if data is None:
+                await asyncio.sleep(backoff(attempt, self.limiter.rate))
+                continue
+            if "error" not in data:
+                return data["response"]
+            if data["error"].get("error_code") != TOO_MANY_REQUESTS or last:
+                raise VkApiError(data["error"])
+            await asyncio.sleep(backoff(attempt, self.limiter.rate))
+
+    async def execute(self, calls):
+        batches = chunked(list(calls), EXECUTE_LIMIT)
+        responses = await asyncio.gather(*(self.call("execute", code=execute_code(batch)) for batch in batches))
+        return [result for response in responses for result in response]
+
+    async def fan_out(self, method, user_ids, id_param="user_id", **method_params):
+        """Один и тот же метод для каждого user_id, результат — {user_id: ответ}."""
+        calls = [(method, {id_param: user_id, **method_params}) for user_id in user_ids]
+        return dict(zip(user_ids, await self.execute(calls)))
+
+
 if __name__ == "__main__":
+    print(oauth_url)
     vk_client = VK_API_CLIENT(TOKEN, 12345)
     # vk_client.replace_status("Hello", "Hi")
-    print(vk_client.get_profile_photos())
\ No newline at end of file
+    print(vk_client.get_profile_photos())
@@ -0,0 +1,60 @@
+# cached против functools.lru_cache: стоимость попадания, промаха с вытеснением
+# и одновременные промахи по одному ключу из потоков (single-flight)
+# Запуск: python bench_cache.py [вызовов]
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import sys
+import time
+import timeit
+
+from decorator_cache import cached
+
+CALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+THREADS = 32
+SLOW_CALL = 0.05
+
+
+def square(x):
+    return x * x
+
+
+def ns_per_call(stmt, calls=CALLS):
+    return min(timeit.repeat(stmt, number=calls, repeat=5)) / calls * 1e9
+
+
+def concurrent_misses(decorate):
+    calls = 0
+
+    def slow(x):
+        nonlocal calls
+        calls += 1
+        time.sleep(SLOW_CALL)
+        return x
+
+    func = decorate(slow)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as executor:
+        list(executor.map(func, [1] * THREADS))
+    return calls, time.perf_counter() - start
+
+
+def main():
+    candidates = {
+        "lru_cache": lru_cache(maxsize=128),
+        "cached": cached(maxsize=128),
+        "cached, ttl": cached(maxsize=128, ttl=60),
+    }
+    print(f"{'cache':<14}{'hit ns':>9}{'miss+evict ns':>15}{'same-key calls':>16}{'wall s':>8}")
+    for name, decorate in candidates.items():
+        func = decorate(square)
+        func(1)
+        hit = ns_per_call(lambda: func(1))
+        # Ключи идут по кругу шире maxsize: каждый вызов — промах с вытеснением
+        keys = iter(range(10**12))
+        miss = ns_per_call(lambda: func(next(keys)), CALLS // 4)
+        calls, wall = concurrent_misses(decorate)
+        print(f"{name:<14}{hit:>9.0f}{miss:>15.0f}{calls:>16}{wall:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
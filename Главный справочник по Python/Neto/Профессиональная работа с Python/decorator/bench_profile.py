@@ -0,0 +1,44 @@
+# Накладные расходы декораторов на вызов пустой функции, нс/вызов
+# Запуск: python bench_profile.py [вызовов]
+import contextlib
+import io
+import sys
+import timeit
+
+from decorator_profile import Registry, profile
+from decorator_timefreeze import decorator_time_freeze
+from decorator_trace import decorator_trace
+
+CALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+
+def noop(a, b, c):
+    return a
+
+
+def bench(func, calls=CALLS):
+    return min(timeit.repeat(lambda: func(1, 2, 3), number=calls, repeat=5)) / calls * 1e9
+
+
+def main():
+    registry = Registry()
+    baseline = bench(noop)
+    candidates = {
+        "profile, every call": profile("every", registry=registry)(noop),
+        "profile, sample 1%": profile("sampled", sample_rate=0.01, registry=registry)(noop),
+        "profile, disabled": profile("disabled", sample_rate=0, registry=registry)(noop),
+        # Старые декораторы печатают на каждый вызов: вывод уходит в буфер, чтобы мерить не терминал
+        "decorator_time_freeze": decorator_time_freeze(noop),
+        "decorator_trace": decorator_trace(noop),
+    }
+    print(f"{'decorator':<24}{'ns/call':>10}{'overhead ns':>13}")
+    print(f"{'none':<24}{baseline:>10.0f}{0:>13.0f}")
+    for name, func in candidates.items():
+        calls = CALLS if name.startswith("profile") else CALLS // 20
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed = bench(func, calls)
+        print(f"{name:<24}{elapsed:>10.0f}{elapsed - baseline:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
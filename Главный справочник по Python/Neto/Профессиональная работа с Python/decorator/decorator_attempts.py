@@ -1,23 +1,195 @@
 
 from functools import wraps
+import asyncio
+import inspect
+import random
+import threading
 import time
 
-def attempts(n_arguments=10, time_sleep=0.1):
+
+class CircuitOpenError(Exception):
+    """Вызов не выполнялся: предохранитель разомкнут после серии ошибок."""
+
+
+class CircuitBreaker:
+    """Предохранитель: после failure_threshold ошибок подряд вызовы сразу отклоняются на reset_timeout секунд,
+    затем пропускается один пробный вызов — успех замыкает цепь, ошибка снова размыкает."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def release(self):
+        # Вызов прерван без результата (отмена, KeyboardInterrupt): состояние не меняем, но пробный слот освобождаем
+        with self.lock:
+            self.probing = False
+
+
+class RetryStats:
+    def __init__(self):
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0        # отклонено разомкнутым предохранителем
+        self.sleep_time = 0.0    # сколько задержки добавили паузы между попытками
+        self.lock = threading.Lock()
+
+    def add(self, **counters):
+        with self.lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self):
+        with self.lock:
+            return {name: value for name, value in vars(self).items() if name != "lock"}
+
+
+def attempts(n_arguments=10, time_sleep=0.1, backoff=2, max_sleep=10, jitter=True,
+             retry_on=(Exception,), retry_if=None, deadline=None, breaker=None):
+    """Повторяет вызов до n_arguments раз и пробрасывает последнее исключение, если все попытки неудачны.
+
+    Пауза перед k-й повторной попыткой — time_sleep * backoff ** k, не больше max_sleep, с full jitter.
+    Повторяются только исключения из retry_on, для которых retry_if(exception) истинно;
+    только они же считаются сбоями для breaker.
+    deadline — общий бюджет в секундах на все попытки вместе с паузами.
+    Работает и с обычными функциями, и с async def; у async пауза не блокирует поток.
+    Счётчики — в new_func.stats.
+    """
 
     def decorator__attempts(func):
-        @wraps(func)
-        def new_func(*args, **kwargs):
-            error = None
-            for _ in range(n_arguments):
-                try:
-                    result = func(*args, **kwargs)
-                    return result
-                except Exception as exception:
-                    error = exception
-                    time.sleep(time_sleep)
-            return error
-        
+        stats = RetryStats()
+
+        def delay(attempt, started):
+            # None — повторять больше нельзя: попытки кончились или пауза не влезает в deadline
+            if attempt + 1 >= n_arguments:
+                return None
+            sleep = min(max_sleep, time_sleep * backoff ** attempt)
+            if jitter:
+                sleep = random.uniform(0, sleep)
+            if deadline is not None and time.monotonic() - started + sleep > deadline:
+                return None
+            return sleep
+
+        def should_retry(exception):
+            if not isinstance(exception, retry_on):
+                return False
+            return retry_if is None or retry_if(exception)
+
+        def before_attempt():
+            if breaker is not None and not breaker.allow():
+                stats.add(rejected=1)
+                raise CircuitOpenError(f"{func.__name__}: circuit is open")
+            stats.add(attempts=1)
+
+        def after_failure(exception, attempt, started):
+            # Возвращает паузу перед следующей попыткой либо None, если надо пробросить исключение
+            retryable = should_retry(exception)
+            if breaker is not None:
+                # Предохранитель считает только сбои, которые и повторялись бы (таймаут, 503).
+                # Неповторяемая ошибка вроде 404 значит, что сервис ответил, — для цепи это успех
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            # Если эта ошибка разомкнула предохранитель, пробрасываем её саму, а не CircuitOpenError на следующей попытке
+            tripped = breaker is not None and breaker.state == "open"
+            sleep = delay(attempt, started) if retryable and not tripped else None
+            if sleep is None:
+                stats.add(failures=1)
+            else:
+                stats.add(retries=1, sleep_time=sleep)
+            return sleep
+
+        def after_success():
+            if breaker is not None:
+                breaker.record_success()
+
+        def after_abort():
+            # CancelledError и прочие BaseException: без этого пробный вызов навсегда занял бы слот half-open
+            if breaker is not None:
+                breaker.release()
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def new_func(*args, **kwargs):
+                stats.add(calls=1)
+                started = time.monotonic()
+                for attempt in range(n_arguments):
+                    before_attempt()
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception as exception:
+                        sleep = after_failure(exception, attempt, started)
+                        if sleep is None:
+                            raise
+                        await asyncio.sleep(sleep)
+                    except BaseException:
+                        after_abort()
+                        raise
+                    else:
+                        after_success()
+                        return result
+        else:
+            @wraps(func)
+            def new_func(*args, **kwargs):
+                stats.add(calls=1)
+                started = time.monotonic()
+                for attempt in range(n_arguments):
+                    before_attempt()
+                    try:
+                        result = func(*args, **kwargs)
+                    except Exception as exception:
+                        sleep = after_failure(exception, attempt, started)
+                        if sleep is None:
+                            raise
+                        time.sleep(sleep)
+                    except BaseException:
+                        after_abort()
+                        raise
+                    else:
+                        after_success()
+                        return result
+
+        new_func.stats = stats
+        new_func.breaker = breaker
         return new_func
-    return decorator__attempts        
+    return decorator__attempts
+
 
-attempts_10 = attempts(n_arguments=20, time_sleep=1)
\ No newline at end of file
+attempts_10 = attempts(n_arguments=20, time_sleep=1)
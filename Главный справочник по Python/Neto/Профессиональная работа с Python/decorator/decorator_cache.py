@@ -0,0 +1,239 @@
+from collections import OrderedDict
+from functools import wraps
+import asyncio
+import atexit
+import inspect
+import os
+import pickle
+import threading
+import time
+
+
+class KwargsMark:
+    """Разделитель позиционных и именованных аргументов в ключе. Класс, а не object(): ключ должен пережить pickle."""
+
+
+def make_key(*args, **kwargs):
+    # Как у functools.lru_cache: одиночный int/str — сам себе ключ, иначе кортеж аргументов
+    if not kwargs:
+        if len(args) == 1 and type(args[0]) in (int, str):
+            return args[0]
+        return args
+    return args + (KwargsMark,) + tuple(kwargs.items())
+
+
+class InFlight:
+    """Идущее вычисление ключа. Event создаётся, только если кто-то пришёл за тем же ключом и ждёт."""
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = None
+        self.value = None
+        self.error = None
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0     # промахи, дождавшиеся уже идущего вычисления того же ключа
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def cached(maxsize=128, ttl=None, key=make_key, persist=None):
+    """Мемоизация для обычных и async def функций.
+
+    maxsize — сколько значений хранить, лишние вытесняются по LRU (None — без ограничения);
+    ttl — сколько секунд значение считается свежим (None — всегда);
+    key(*args, **kwargs) — ключ кэша;
+    persist — путь к pickle-файлу: кэш читается из него при декорировании и сохраняется при выходе.
+    Одновременные промахи по одному ключу ждут одно вычисление вместо того, чтобы запускать своё.
+    Исключения не кэшируются.
+    """
+
+    def decorator_cache(func):
+        data = OrderedDict()  # ключ -> (значение, момент устаревания по time.monotonic или None)
+        in_flight = {}
+        stats = CacheStats()
+        lock = threading.Lock()
+
+        def lookup(cache_key):
+            # Вызывается под lock; возвращает (найдено, значение)
+            entry = data.get(cache_key)
+            if entry is None:
+                return False, None
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del data[cache_key]
+                stats.expirations += 1
+                return False, None
+            data.move_to_end(cache_key)
+            stats.hits += 1
+            return True, value
+
+        def fast_lookup(cache_key):
+            # Попадание читается без блокировки: get и move_to_end у OrderedDict атомарны под GIL.
+            # Счётчик hits при этом может изредка недосчитать при гонке потоков
+            entry = data.get(cache_key)
+            if entry is None or (entry[1] is not None and entry[1] <= time.monotonic()):
+                return False, None
+            try:
+                data.move_to_end(cache_key)
+            except KeyError:
+                pass  # ключ только что вытеснили, значение всё равно верное
+            stats.hits += 1
+            return True, entry[0]
+
+        def store(cache_key, value):
+            # Вызывается под lock
+            data[cache_key] = (value, time.monotonic() + ttl if ttl is not None else None)
+            data.move_to_end(cache_key)
+            if maxsize is not None and len(data) > maxsize:
+                data.popitem(last=False)
+                stats.evictions += 1
+
+        def release(cache_key, call):
+            # Вызывается под lock. False — пока шло вычисление, ключ инвалидировали:
+            # ожидающие получат результат, но в кэш он не попадёт, и чужую запись in_flight не трогаем
+            if in_flight.get(cache_key) is not call:
+                return False
+            del in_flight[cache_key]
+            return True
+
+        if inspect.iscoroutinefunction(func):
+            async def load(cache_key, args, kwargs):
+                # load выполняется задачей, которая и лежит в in_flight
+                task = asyncio.current_task()
+                try:
+                    value = await func(*args, **kwargs)
+                except BaseException:
+                    with lock:
+                        release(cache_key, task)
+                    raise
+                with lock:
+                    if release(cache_key, task):
+                        store(cache_key, value)
+                return value
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                cache_key = key(*args, **kwargs)
+                found, value = fast_lookup(cache_key)
+                if found:
+                    return value
+                with lock:
+                    found, value = lookup(cache_key)
+                    if found:
+                        return value
+                    task = in_flight.get(cache_key)
+                    if task is None:
+                        stats.misses += 1
+                        task = in_flight[cache_key] = asyncio.ensure_future(load(cache_key, args, kwargs))
+                    else:
+                        stats.coalesced += 1
+                # shield: отмена одного ожидающего не отменяет общую загрузку для остальных
+                return await asyncio.shield(task)
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                cache_key = key(*args, **kwargs)
+                found, value = fast_lookup(cache_key)
+                if found:
+                    return value
+                with lock:
+                    found, value = lookup(cache_key)
+                    if found:
+                        return value
+                    call = in_flight.get(cache_key)
+                    owner = call is None
+                    if owner:
+                        stats.misses += 1
+                        call = in_flight[cache_key] = InFlight()
+                    else:
+                        stats.coalesced += 1
+                        if call.event is None:
+                            call.event = threading.Event()
+                if not owner:
+                    call.event.wait()
+                    if call.error is not None:
+                        raise call.error
+                    return call.value
+                try:
+                    value = func(*args, **kwargs)
+                except BaseException as exception:
+                    with lock:
+                        release(cache_key, call)
+                        call.error = exception
+                    raise
+                else:
+                    with lock:
+                        if release(cache_key, call):
+                            store(cache_key, value)
+                        call.value = value
+                    return value
+                finally:
+                    # После release (или инвалидации) новые ожидающие появиться не могут, event уже не изменится
+                    if call.event is not None:
+                        call.event.set()
+
+        def cache_info():
+            with lock:
+                return {**stats.as_dict(), "size": len(data), "maxsize": maxsize, "ttl": ttl}
+
+        def cache_clear():
+            with lock:
+                data.clear()
+                in_flight.clear()
+
+        def cache_invalidate(*args, **kwargs):
+            # Идущее вычисление тоже забываем: оно могло прочитать данные до изменения.
+            # Следующий вызов запустит новое, а старое отдаст результат только своим ожидающим
+            cache_key = key(*args, **kwargs)
+            with lock:
+                data.pop(cache_key, None)
+                in_flight.pop(cache_key, None)
+
+        def cache_save(path=persist):
+            if not path:
+                raise ValueError("cache_save() needs a path when the cache was created without persist")
+            # На диск пишется время устаревания по часам системы: monotonic между запусками не сравним
+            now, wall = time.monotonic(), time.time()
+            with lock:
+                entries = [
+                    (cache_key, value, wall + expires - now if expires is not None else None)
+                    for cache_key, (value, expires) in data.items()
+                    if expires is None or expires > now
+                ]
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as file:
+                pickle.dump(entries, file)
+            os.replace(tmp_path, path)
+
+        def cache_load(path=persist):
+            try:
+                with open(path, "rb") as file:
+                    entries = pickle.load(file)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                return
+            now, wall = time.monotonic(), time.time()
+            with lock:
+                for cache_key, value, expires_at in entries:
+                    if expires_at is None or expires_at > wall:
+                        data[cache_key] = (value, now + expires_at - wall if expires_at is not None else None)
+                while maxsize is not None and len(data) > maxsize:
+                    data.popitem(last=False)
+
+        if persist:
+            cache_load()
+            atexit.register(cache_save)
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_invalidate = cache_invalidate
+        wrapper.cache_save = cache_save
+        return wrapper
+    return decorator_cache
@@ -0,0 +1,290 @@
+from functools import wraps
+import inspect
+import threading
+import time
+import weakref
+
+# HDR-гистограмма: на каждую степень двойки SUB_BUCKETS корзин одинаковой ширины,
+# то есть относительная погрешность квантилей не больше 1/SUB_BUCKETS (~6%) на любом масштабе
+SUB_BITS = 4
+SUB_BUCKETS = 1 << SUB_BITS
+SUB_MASK = SUB_BUCKETS - 1
+BUCKETS = (64 - SUB_BITS + 1) * SUB_BUCKETS
+PRUNE_MIN = 64  # с какого числа гистограмм потоков начинать чистку завершившихся
+
+# Границы корзин при выгрузке в Prometheus, в секундах
+PROMETHEUS_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+
+
+def bucket_index(value):
+    if value < SUB_BUCKETS:
+        return max(value, 0)
+    shift = value.bit_length() - 1 - SUB_BITS
+    return ((shift + 1) << SUB_BITS) | ((value >> shift) & SUB_MASK)
+
+
+def bucket_bounds(index):
+    # [нижняя, верхняя) граница корзины в наносекундах
+    if index < SUB_BUCKETS:
+        return index, index + 1
+    shift = (index >> SUB_BITS) - 1
+    low = SUB_BUCKETS + (index & SUB_MASK)
+    return low << shift, (low + 1) << shift
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.calls = 0   # все вызовы, включая не попавшие в выборку
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.errors = 0
+
+    def record(self, value):
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.calls += other.calls
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.errors += other.errors
+
+    def quantile(self, q):
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                low, high = bucket_bounds(index)
+                return min((low + high) // 2, self.max)
+        return self.max
+
+    def cumulative(self, bounds_ns):
+        # Сколько значений не больше каждой границы; корзина относится к границе по своей верхней грани
+        result = []
+        index = seen = 0
+        for bound in bounds_ns:
+            while index < BUCKETS and bucket_bounds(index)[1] <= bound + 1:
+                seen += self.counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+
+class FunctionStats:
+    """Статистика одной функции. У каждого потока своя гистограмма, поэтому запись идёт без блокировок;
+    при чтении гистограммы потоков складываются. Гистограммы завершившихся потоков сворачиваются в retired."""
+
+    def __init__(self, name, sample_every=1):
+        self.name = name
+        self.sample_every = sample_every
+        self.local = threading.local()
+        self.histograms = []        # пары (weakref на поток, его гистограмма)
+        self.retired = Histogram()  # сумма гистограмм потоков, которые уже завершились
+        self.prune_at = PRUNE_MIN
+        self.lock = threading.Lock()
+
+    @property
+    def calls(self):
+        return self.merged().calls
+
+    def thread_histogram(self):
+        histogram = Histogram()
+        with self.lock:
+            # При короткоживущих потоках список рос бы без предела: когда он удвоился, убираем мёртвые
+            if len(self.histograms) >= self.prune_at:
+                self.prune()
+                self.prune_at = max(PRUNE_MIN, 2 * len(self.histograms))
+            self.histograms.append((weakref.ref(threading.current_thread()), histogram))
+        self.local.histogram = histogram
+        return histogram
+
+    def prune(self):
+        # Вызывается под self.lock. Завершившийся поток больше не пишет, его гистограмму можно слить
+        alive = []
+        for thread_ref, histogram in self.histograms:
+            thread = thread_ref()
+            if thread is None or not thread.is_alive():
+                self.retired.merge(histogram)
+            else:
+                alive.append((thread_ref, histogram))
+        self.histograms = alive
+
+    def record(self, histogram, elapsed_ns, failed=False):
+        # Горячий путь: Histogram.record развёрнут вручную, чтобы не платить за лишние вызовы
+        shift = elapsed_ns.bit_length() - 1 - SUB_BITS
+        histogram.counts[elapsed_ns if shift < 0 else ((shift + 1) << SUB_BITS) | ((elapsed_ns >> shift) & SUB_MASK)] += 1
+        histogram.count += 1
+        histogram.total += elapsed_ns
+        if elapsed_ns > histogram.max:
+            histogram.max = elapsed_ns
+        if failed:
+            histogram.errors += 1
+
+    def merged(self):
+        result = Histogram()
+        with self.lock:
+            self.prune()
+            result.merge(self.retired)
+            histograms = [histogram for _, histogram in self.histograms]
+        for histogram in histograms:
+            result.merge(histogram)
+        return result
+
+    def snapshot(self):
+        histogram = self.merged()
+        return {
+            "calls": histogram.calls,
+            "sampled": histogram.count,
+            "errors": histogram.errors,
+            "mean_ns": histogram.total / histogram.count if histogram.count else 0,
+            "p50_ns": histogram.quantile(0.5),
+            "p90_ns": histogram.quantile(0.9),
+            "p99_ns": histogram.quantile(0.99),
+            "max_ns": histogram.max,
+        }
+
+
+class Registry:
+    def __init__(self):
+        self.functions = {}
+        self.lock = threading.Lock()
+
+    def get(self, name, sample_every=1):
+        with self.lock:
+            if name not in self.functions:
+                self.functions[name] = FunctionStats(name, sample_every)
+            return self.functions[name]
+
+    def reset(self):
+        with self.lock:
+            self.functions.clear()
+
+
+REGISTRY = Registry()
+
+
+def profile(name=None, sample_rate=1.0, registry=REGISTRY):
+    """Считает вызовы и пишет время выполнения в HDR-гистограмму реестра.
+
+    sample_rate < 1 — время меряется только у каждого round(1 / sample_rate)-го вызова в потоке,
+    остальные вызовы стоят одного инкремента счётчика. Ошибки считаются среди измеренных вызовов.
+    sample_rate=0 возвращает функцию без обёртки.
+    """
+    sample_every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+
+    def decorator_profile(func):
+        if not sample_every:
+            # sample_rate=0 — профилирование выключено, функция остаётся как есть
+            return func
+        stats = registry.get(name or f"{func.__module__}.{func.__qualname__}", sample_every)
+        local = stats.local
+        clock = time.perf_counter_ns
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                # Счётчик вызовов тоже в гистограмме потока: и выборка, и итог без общих счётчиков и блокировок
+                try:
+                    histogram = local.histogram
+                except AttributeError:
+                    histogram = stats.thread_histogram()
+                histogram.calls += 1
+                if histogram.calls % sample_every:
+                    return await func(*args, **kwargs)
+                start = clock()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException:
+                    stats.record(histogram, clock() - start, True)
+                    raise
+                stats.record(histogram, clock() - start)
+                return result
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                # Счётчик вызовов тоже в гистограмме потока: и выборка, и итог без общих счётчиков и блокировок
+                try:
+                    histogram = local.histogram
+                except AttributeError:
+                    histogram = stats.thread_histogram()
+                histogram.calls += 1
+                if histogram.calls % sample_every:
+                    return func(*args, **kwargs)
+                start = clock()
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException:
+                    stats.record(histogram, clock() - start, True)
+                    raise
+                stats.record(histogram, clock() - start)
+                return result
+
+        wrapper.stats = stats
+        return wrapper
+    return decorator_profile
+
+
+def format_ns(value):
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if value >= scale:
+            return f"{value / scale:.2f} {unit}"
+    return f"{value:.0f} ns"
+
+
+def report(registry=REGISTRY):
+    lines = [f"{'function':<40}{'calls':>10}{'sampled':>10}{'errors':>8}{'mean':>12}{'p50':>12}{'p99':>12}{'max':>12}"]
+    for name, stats in sorted(registry.functions.items()):
+        snapshot = stats.snapshot()
+        lines.append(
+            f"{name:<40}{snapshot['calls']:>10}{snapshot['sampled']:>10}{snapshot['errors']:>8}"
+            + "".join(f"{format_ns(snapshot[key]):>12}" for key in ("mean_ns", "p50_ns", "p99_ns", "max_ns"))
+        )
+    return "\n".join(lines)
+
+
+def prometheus(registry=REGISTRY, prefix="function"):
+    """Текстовый формат Prometheus: счётчики вызовов и ошибок и гистограмма длительности в секундах."""
+    bounds_ns = [int(bound * 1e9) for bound in PROMETHEUS_BUCKETS]
+    # Строки одной метрики должны идти одной группой, поэтому сначала снимаем все значения
+    calls = [f"# TYPE {prefix}_calls_total counter"]
+    errors = [f"# TYPE {prefix}_errors_total counter"]
+    durations = [f"# TYPE {prefix}_duration_seconds histogram"]
+    for name, stats in sorted(registry.functions.items()):
+        label = f'function="{name}"'
+        histogram = stats.merged()
+        cumulative = histogram.cumulative(bounds_ns)
+        count, total, error_count = histogram.count, histogram.total, histogram.errors
+        calls.append(f"{prefix}_calls_total{{{label}}} {histogram.calls}")
+        errors.append(f"{prefix}_errors_total{{{label}}} {error_count}")
+        for bound, seen in zip(PROMETHEUS_BUCKETS, cumulative):
+            durations.append(f'{prefix}_duration_seconds_bucket{{{label},le="{bound:g}"}} {seen}')
+        durations.append(f'{prefix}_duration_seconds_bucket{{{label},le="+Inf"}} {count}')
+        durations.append(f"{prefix}_duration_seconds_sum{{{label}}} {total / 1e9}")
+        durations.append(f"{prefix}_duration_seconds_count{{{label}}} {count}")
+    lines = calls + errors + durations
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    @profile(sample_rate=0.1)
+    def foo(a, b, c):
+        time.sleep(0.001)
+        return a + b + c
+
+    for i in range(200):
+        foo(1, 2, i)
+    print(report())
+    print(prometheus())
@@ -22,4 +22,5 @@ def foo(a, b, c):
     time.sleep(1.1)
     return a + b + c
 
-foo(1, 2, 4)
\ No newline at end of file
+if __name__ == "__main__":
+    foo(1, 2, 4)
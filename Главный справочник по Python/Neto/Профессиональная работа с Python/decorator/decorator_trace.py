@@ -17,4 +17,5 @@ def decorator_trace(func):
 def foo(a, b, c):
     return a + b + c
 
-foo(1, 2, 4)
\ No newline at end of file
+if __name__ == "__main__":
+    foo(1, 2, 4)
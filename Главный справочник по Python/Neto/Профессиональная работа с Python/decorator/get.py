@@ -1,12 +1,35 @@
 import requests
 from decorator_timefreeze import decorator_time_freeze
 from decorator_trace import decorator_trace
-from decorator_attempts import attempts
+from decorator_attempts import attempts, CircuitBreaker
+from decorator_cache import cached
+
+# После 5 неудачных попыток подряд SWAPI 30 секунд не дёргаем, вызовы сразу падают с CircuitOpenError
+swapi_breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+
+
+def is_transient(exception):
+    # Повторять имеет смысл сетевые ошибки, 429 и 5xx; 404 и прочие 4xx от повтора не исправятся
+    if isinstance(exception, requests.HTTPError):
+        return exception.response.status_code == 429 or exception.response.status_code >= 500
+    return isinstance(exception, (requests.ConnectionError, requests.Timeout))
+
 
 # @decorator_trace
 # @decorator_time_freeze
-@attempts(n_arguments=20, time_sleep=1)
+# Персонажи SWAPI почти не меняются: повторные запросы того же id берутся из кэша,
+# а до ретраев и предохранителя доходят только промахи
+@cached(maxsize=256, ttl=300)
+@attempts(n_arguments=5, time_sleep=0.5, retry_on=(requests.RequestException,), retry_if=is_transient,
+          deadline=10, breaker=swapi_breaker)
 def get_person_by_id(id):
-    return requests.get(f"https://swapi.dev/api/people/{id}").json()
+    response = requests.get(f"https://swapi.dev/api/people/{id}", timeout=5)
+    response.raise_for_status()
+    return response.json()
+
 
-get_person_by_id(1)
\ No newline at end of file
+if __name__ == "__main__":
+    print(get_person_by_id(1))
+    print(get_person_by_id(1))
+    print(get_person_by_id.stats.as_dict())
+    print(get_person_by_id.cache_info())
@@ -0,0 +1,68 @@
+# Бенчмарк разбора страницы статьи: время на страницу и пиковая память для soup / xpath / stream
+# Каждый вариант меряется в отдельном процессе: tracemalloc видит только Python-объекты,
+# память libxml2 видна лишь по приросту пикового RSS.
+# Запуск: python bench_extract.py [каталог с фикстурами] [повторов]
+import glob
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import fixtures
+from extract import EXTRACTORS
+
+REPEATS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+
+def load_pages(root=None):
+    if root is None:
+        return [fixtures.article_page(article_id) for article_id in range(1, 21)]
+    pages = []
+    for path in sorted(glob.glob(os.path.join(root, "ru", "articles", "*", "index.html"))):
+        with open(path, encoding="utf-8") as file:
+            pages.append(file.read())
+    return pages
+
+
+def measure(name, pages):
+    extractor = EXTRACTORS[name]
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    for page in pages:
+        extractor(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        for page in pages:
+            extractor(page)
+    per_page = (time.perf_counter() - start) / (REPEATS * len(pages))
+    return per_page, peak, rss_growth
+
+
+def normalized(result):
+    text, views = result
+    return " ".join(text.split()), views
+
+
+def main():
+    pages = load_pages(sys.argv[1] if len(sys.argv) > 1 else None)
+    expected = [normalized(EXTRACTORS["soup"](page)) for page in pages]
+    for name, extractor in EXTRACTORS.items():
+        if [normalized(extractor(page)) for page in pages] != expected:
+            print(f"{name}: results differ from soup")
+    size = sum(map(len, pages)) / len(pages) / 1024
+    print(f"{len(pages)} pages, {size:.0f} KiB on average, {REPEATS} repeats")
+    print(f"{'extractor':<10}{'ms/page':>9}{'py heap peak KiB':>18}{'RSS growth KiB':>16}")
+    for name in EXTRACTORS:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            per_page, peak, rss_growth = executor.submit(measure, name, pages).result()
+        print(f"{name:<10}{per_page * 1000:>9.2f}{peak / 1024:>18.0f}{rss_growth:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# Бенчмарк обхода ленты на локальных фикстурах: последовательно, параллельно, с холодным и тёплым кэшем
+# Запуск: python bench_parser.py [каталог с фикстурами] — без аргумента страницы генерируются (fixtures.py)
+import io
+import sys
+import tempfile
+import time
+
+import fixtures
+from habrParser import WORKERS, HttpCache, crawl, write_records
+
+
+def run(name, list_url, workers, cache=None):
+    start = time.perf_counter()
+    count = write_records(crawl(list_url, workers=workers, cache=cache), io.StringIO())
+    elapsed = time.perf_counter() - start
+    cache_info = f", 304: {cache.hits}, 200: {cache.misses}" if cache else ""
+    print(f"{name:<26}{count:>6}{elapsed:>9.2f}{count / elapsed:>10.1f}{cache_info}")
+    if cache:
+        cache.hits = cache.misses = 0
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = sys.argv[1] if len(sys.argv) > 1 else tmp
+        if len(sys.argv) == 1:
+            fixtures.generate(root)
+        server, base_url = fixtures.serve(root)
+        list_url = f"{base_url}/ru/articles/"
+        print(f"latency {fixtures.LATENCY * 1000:.0f} ms per page, {WORKERS} workers")
+        print(f"{'mode':<26}{'pages':>6}{'seconds':>9}{'pages/s':>10}")
+        run("sequential, no cache", list_url, 1)
+        run("parallel, no cache", list_url, WORKERS)
+        cache = HttpCache(f"{tmp}/cache")
+        run("parallel, cold cache", list_url, WORKERS, cache)
+        run("parallel, warm cache", list_url, WORKERS, cache)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
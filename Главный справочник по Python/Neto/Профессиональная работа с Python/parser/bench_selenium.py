@@ -0,0 +1,34 @@
+# Обход ленты через Selenium на локальных фикстурах: один браузер без блокировки ресурсов против пула
+# Запуск: python bench_selenium.py [браузеров] [статей]
+import sys
+import tempfile
+import time
+
+import fixtures
+from habrSelenium import crawl, timing_report
+
+BROWSERS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+ARTICLES = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+
+def run(name, list_url, browsers, block_resources):
+    start = time.perf_counter()
+    records = list(crawl(list_url, browsers=browsers, block_resources=block_resources))
+    print(f"{name:<30}{time.perf_counter() - start:>7.2f} s  {timing_report(records)}")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        fixtures.generate(root, ARTICLES)
+        server, base_url = fixtures.serve(root)
+        list_url = f"{base_url}/ru/articles/"
+        print(f"{ARTICLES} articles, page latency {fixtures.LATENCY * 1000:.0f} ms, "
+              f"static latency {fixtures.STATIC_LATENCY * 1000:.0f} ms")
+        run("1 browser, all resources", list_url, 1, False)
+        run("1 browser, blocked resources", list_url, 1, True)
+        run(f"{BROWSERS} browsers, blocked resources", list_url, BROWSERS, True)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Извлечение текста статьи и числа просмотров со страницы Habr.
+#   soup   — полное дерево BeautifulSoup, как было в habrParser.py
+#   xpath  — дерево lxml без обёрток bs4, нужные узлы находятся XPath
+#   stream — lxml HTMLPullParser: документ подаётся кусками, разбор обрывается, как только
+#            найдены тело и шапка, поэтому комментарии под статьёй вообще не разбираются
+# Во всех вариантах текст обрезается до TEXT_LIMIT символов, у lxml — без склейки всего текста тела
+from itertools import chain
+import os
+
+from bs4 import BeautifulSoup
+from lxml import etree, html
+
+EXTRACTOR = os.getenv("EXTRACTOR", "stream")
+TEXT_LIMIT = 100
+CHUNK_SIZE = 16 * 1024
+
+BODY_ID = "post-content-body"
+HEADER_CLASS = "tm-article-presenter__header"
+VIEWS_CLASS = "tm-icon-counter__value"
+
+
+def has_class(name):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+BODY_XPATH = etree.XPath(f'//div[@id="{BODY_ID}"]')
+VIEWS_XPATH = etree.XPath(f"//div[{has_class(HEADER_CLASS)}]//span[{has_class(VIEWS_CLASS)}]")
+HEADER_VIEWS_XPATH = etree.XPath(f".//span[{has_class(VIEWS_CLASS)}]")
+
+
+def truncated_text(strings, limit=TEXT_LIMIT):
+    """То же, что "".join(strings).strip()[:limit], но читает строки только до limit символов."""
+    text = ""
+    for string in strings:
+        text = (text + string).lstrip() if not text else text + string
+        # Хвост за limit должен содержать непробельный символ, иначе strip() мог бы его срезать
+        if len(text) > limit and text[limit:].strip():
+            return text[:limit]
+    return text.strip()[:limit]
+
+
+def element_text(element):
+    return "".join(element.itertext()).strip() if element is not None else None
+
+
+def extract_soup(article_html_data):
+    article_main_soup = BeautifulSoup(article_html_data, "lxml")
+    article_body_tag = article_main_soup.find("div", id=BODY_ID)
+    if article_body_tag is None:
+        raise ValueError(f"no #{BODY_ID} on the page")
+    article_body_text = article_body_tag.text.strip()[0:TEXT_LIMIT]
+    presenter_header_tag = article_main_soup.find("div", class_=HEADER_CLASS)
+    views_tag = presenter_header_tag.find("span", class_=VIEWS_CLASS) if presenter_header_tag else None
+    views = views_tag.text.strip() if views_tag else None
+    return article_body_text, views
+
+
+def extract_xpath(article_html_data):
+    tree = html.fromstring(article_html_data)
+    bodies = BODY_XPATH(tree)
+    if not bodies:
+        raise ValueError(f"no #{BODY_ID} on the page")
+    views = VIEWS_XPATH(tree)
+    return truncated_text(bodies[0].itertext()), element_text(views[0] if views else None)
+
+
+def extract_stream(article_html_data):
+    parser = etree.HTMLPullParser(events=("end",), tag=("div",))
+    body_text = views = None
+    header_seen = False
+    chunks = (article_html_data[start:start + CHUNK_SIZE] for start in range(0, len(article_html_data), CHUNK_SIZE))
+    # Последний шаг — close(): хвост документа lxml отдаёт только при закрытии парсера
+    for chunk in chain(chunks, [None]):
+        if chunk is None:
+            parser.close()
+        else:
+            parser.feed(chunk)
+        for _, element in parser.read_events():
+            if element.get("id") == BODY_ID:
+                body_text = truncated_text(element.itertext())
+            elif HEADER_CLASS in (element.get("class") or "").split():
+                header_seen = True
+                found = HEADER_VIEWS_XPATH(element)
+                views = element_text(found[0] if found else None)
+        if body_text is not None and header_seen:
+            break
+    if body_text is None:
+        raise ValueError(f"no #{BODY_ID} on the page")
+    return body_text, views
+
+
+EXTRACTORS = {"soup": extract_soup, "xpath": extract_xpath, "stream": extract_stream}
+
+
+def get_extractor(name=EXTRACTOR):
+    return EXTRACTORS[name]
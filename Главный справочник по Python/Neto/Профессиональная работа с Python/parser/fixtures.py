@@ -0,0 +1,139 @@
+# Фикстуры для парсеров Habr: страницы лежат в каталоге по тем же путям, что и на сайте
+# (<dir>/ru/articles/index.html, <dir>/ru/articles/<id>/index.html) и раздаются локальным сервером.
+#   python fixtures.py generate <dir> [статей]  — синтетические страницы с разметкой как у Habr
+#   python fixtures.py save <dir>               — сохранить настоящую ленту и статьи с habr.com
+#   python fixtures.py serve <dir> [порт]       — раздать каталог, FIXTURE_LATENCY — задержка ответа, с
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin, urlparse
+
+LATENCY = float(os.getenv("FIXTURE_LATENCY", 0.05))
+STATIC_LATENCY = float(os.getenv("FIXTURE_STATIC_LATENCY", 0.1))  # картинки, шрифты, css
+WORDS = "python парсер статья код данные сервер запрос ответ страница браузер очередь поток".split()
+
+
+def text(words, rnd):
+    return " ".join(rnd.choice(WORDS) for _ in range(words))
+
+
+def list_page(count):
+    items = "".join(
+        f'<article class="tm-articles-list__item" id="{i}"><div class="tm-article-snippet">'
+        f'<a class="tm-user-info__username" href="/ru/users/user{i}/">user{i}</a>'
+        f'<time datetime="2025-01-{i % 28 + 1:02d}T10:00:00.000Z">{i} янв</time>'
+        f'<h2 class="tm-title"><a class="tm-title__link" href="/ru/articles/{i}/"><span>Статья номер {i}</span></a></h2>'
+        f'</div></article>'
+        for i in range(1, count + 1)
+    )
+    return f'<html><head><title>Habr</title></head><body><div class="tm-articles-list">{items}</div></body></html>'
+
+
+def article_page(article_id, paragraphs=200, comments=300):
+    # Как у настоящей статьи: тяжёлая шапка, само тело — малая часть документа, дальше комментарии
+    rnd = random.Random(article_id)
+    head = "".join(f'<script>var config{i} = {{"key": "{text(20, rnd)}"}};</script>' for i in range(30))
+    body = "".join(f"<p>{text(60, rnd)}</p>" for _ in range(paragraphs))
+    comment_tags = "".join(
+        f'<div class="tm-comment"><span class="tm-user-info__username">user{i}</span><p>{text(30, rnd)}</p></div>'
+        for i in range(comments)
+    )
+    return (
+        '<html><head><title>Статья</title>'
+        '<link rel="stylesheet" href="/static/style.css">'
+        '<style>@font-face { font-family: "Habr"; src: url("/static/font.woff2"); }</style>'
+        f"{head}</head><body>"
+        f'<nav class="tm-header">{text(50, rnd)}</nav>'
+        '<div class="tm-article-presenter__header">'
+        f'<h1 class="tm-title">Статья номер {article_id}</h1>'
+        f'<span class="tm-icon-counter__value">{rnd.randint(1, 99)}.{rnd.randint(0, 9)}K</span></div>'
+        f'<div id="post-content-body"><div class="article-formatted-body">'
+        f'<img src="/static/cover{article_id}.png">{body}</div></div>'
+        f'<div class="tm-comments">{comment_tags}</div></body></html>'
+    )
+
+
+def write_page(root, path, html):
+    directory = os.path.join(root, path.strip("/"))
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "index.html"), "w", encoding="utf-8") as file:
+        file.write(html)
+
+
+def generate(root, count=20, paragraphs=200):
+    write_page(root, "/ru/articles/", list_page(count))
+    for article_id in range(1, count + 1):
+        write_page(root, f"/ru/articles/{article_id}/", article_page(article_id, paragraphs))
+
+
+def save(root, list_url="https://habr.com/ru/articles/"):
+    import requests
+    from bs4 import BeautifulSoup
+    from fake_headers import Headers
+
+    headers = Headers(os="win", browser="chrome").generate()
+    with requests.Session() as session:
+        html = session.get(list_url, headers=headers).text
+        write_page(root, urlparse(list_url).path, html)
+        for link in BeautifulSoup(html, "lxml").select("a.tm-title__link"):
+            url = urljoin(list_url, link["href"])
+            write_page(root, urlparse(url).path, session.get(url, headers=headers).text)
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path.startswith("/static/"):
+            time.sleep(STATIC_LATENCY)
+            self.reply(b"\0" * 50_000, "application/octet-stream")
+            return
+        time.sleep(LATENCY)
+        file_path = os.path.join(self.directory, path.strip("/"), "index.html")
+        if not os.path.isfile(file_path):
+            self.send_error(404)
+            return
+        with open(file_path, "rb") as file:
+            body = file.read()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.reply(body, "text/html; charset=utf-8", {"ETag": etag})
+
+    def reply(self, body, content_type, headers=None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(root, port=0):
+    """Запускает сервер в фоновом потоке, возвращает (server, базовый URL)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), lambda *args: FixtureHandler(*args, directory=root))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    command, root = sys.argv[1], sys.argv[2]
+    if command == "generate":
+        generate(root, int(sys.argv[3]) if len(sys.argv) > 3 else 20)
+    elif command == "save":
+        save(root)
+    elif command == "serve":
+        server, base_url = serve(root, int(sys.argv[3]) if len(sys.argv) > 3 else 8090)
+        print(f"Serving {root} at {base_url}/ru/articles/")
+        threading.Event().wait()
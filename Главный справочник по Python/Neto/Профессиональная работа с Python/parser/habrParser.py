@@ -1,59 +1,166 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin
+import hashlib
+import json
+import os
+import sys
+
 from bs4 import BeautifulSoup
 import requests
+from requests.adapters import HTTPAdapter
 from fake_headers import Headers
 
-response = requests.get("https://www.iplocation.net")
-html_data = response.text
-
-headers = Headers(os="win", browser="chrome")
-
-headers_dict = headers.generate()
-
-response = requests.get("https://habr.com/ru/articles/", headers=headers_dict)
-html_data = response.text
-soup = BeautifulSoup(html_data, "lxml")
+from extract import get_extractor
 
-# 
+HABR_URL = os.getenv("HABR_URL", "https://habr.com/ru/articles/")
+WORKERS = int(os.getenv("WORKERS", 8))        # сколько статей качается одновременно
+CACHE_DIR = os.getenv("CACHE_DIR", ".habr_cache")  # пустая строка — без кэша
+TIMEOUT = float(os.getenv("TIMEOUT", 10))
 
-article_list = soup.find("div", class_="tm-articles-list")
-articles = article_list.find_all("article")
+# Разбор статьи: только тело и счётчик просмотров, без полного дерева BeautifulSoup (см. extract.py)
+parse_article = get_extractor()
 
-articles_data = []
-
-for article_tag in articles:
-    user_name_tag = article_tag.find("a", class_="tm-user-info__username")
-    user_name = user_name_tag.text.strip()
-
-    time_tag = article_tag.find("time")
-    date_time = time_tag["datetime"]
-
-    article_link_tag = article_tag.find("a", class_="tm-title__link")
-    link_relative = article_link_tag["href"]
-    link_absolute = f"https://habr.com{link_relative}"
-
-    title = article_link_tag.text.strip()
+headers = Headers(os="win", browser="chrome")
 
-    response = requests.get(link_absolute, headers=headers_dict)
+headers_dict = headers.generate()
 
-    article_html_data = response.text
-    article_main_soup = BeautifulSoup(article_html_data, "lxml")
-    article_body_tag = article_main_soup.find("div", id="post-content-body")
-    article_body_text = article_body_tag.text.strip()[0:100]
-    presenter_header_tag = article_main_soup.find("div", class_="tm-article-presenter__header")
-    views_tag = presenter_header_tag.find("span",  class_="tm-icon-counter__value")
-    if views_tag:
-        views = views_tag.text.strip()
 
+class HttpCache:
+    """Страницы на диске по ключу URL. Повторный запрос идёт с If-None-Match / If-Modified-Since,
+    и на 304 тело берётся из кэша, а не скачивается заново."""
+
+    def __init__(self, path=CACHE_DIR):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.path, f"{key}.html"), os.path.join(self.path, f"{key}.json")
+
+    def get(self, url):
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as file:
+                meta = json.load(file)
+            with open(body_path, encoding="utf-8") as file:
+                return meta, file.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def put(self, url, response):
+        meta = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        if not meta["etag"] and not meta["last_modified"]:
+            return
+        body_path, meta_path = self._paths(url)
+        # Сначала тело, потом метаданные, оба через os.replace: читатель не увидит полузаписанный файл
+        for path, content in ((body_path, response.text), (meta_path, json.dumps(meta))):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                file.write(content)
+            os.replace(tmp_path, path)
+
+    def fetch(self, session, url):
+        meta, body = self.get(url)
+        request_headers = dict(headers_dict)
+        if meta:
+            if meta["etag"]:
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta["last_modified"]:
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+        response = session.get(url, headers=request_headers, timeout=TIMEOUT)
+        if response.status_code == 304 and body is not None:
+            self.hits += 1
+            return body
+        response.raise_for_status()
+        self.misses += 1
+        self.put(url, response)
+        return response.text
+
+
+def make_session(workers=WORKERS):
+    # Одна сессия на все потоки: соединения с habr.com переиспользуются, пул не меньше числа потоков
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch(session, url, cache=None):
+    if cache is not None:
+        return cache.fetch(session, url)
+    response = session.get(url, headers=headers_dict, timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.text
+
+
+def parse_list(html_data, base_url=HABR_URL):
+    soup = BeautifulSoup(html_data, "lxml")
+    article_list = soup.find("div", class_="tm-articles-list")
+    articles = article_list.find_all("article")
+
+    for article_tag in articles:
+        user_name_tag = article_tag.find("a", class_="tm-user-info__username")
+        user_name = user_name_tag.text.strip()
+
+        time_tag = article_tag.find("time")
+        date_time = time_tag["datetime"]
+
+        article_link_tag = article_tag.find("a", class_="tm-title__link")
+        link_relative = article_link_tag["href"]
+        link_absolute = urljoin(base_url, link_relative)
+
+        title = article_link_tag.text.strip()
+
+        yield {
+            "user_name": user_name,
+            'datetime': date_time,
+            "Link": link_absolute,
+            'title': title,
+        }
+
+
+def load_article(session, article, cache=None):
+    try:
+        article["text"], article["views"] = parse_article(fetch(session, article["Link"], cache))
+    except (requests.RequestException, ValueError):
+        # Статья недоступна или разметка не та — запись всё равно уходит, как в habrSelenium.py
+        article["text"], article["views"] = None, None
+    return article
+
+
+def crawl(list_url=HABR_URL, workers=WORKERS, cache=None, session=None):
+    """Отдаёт записи по мере готовности статей, а не после обхода всей ленты."""
+    own_session = session is None
+    session = session or make_session(workers)
+    try:
+        articles = parse_list(fetch(session, list_url, cache), list_url)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(load_article, session, article, cache) for article in articles]
+            for future in as_completed(futures):
+                yield future.result()
+    finally:
+        if own_session:
+            session.close()
+
+
+def write_records(records, output=sys.stdout):
+    # JSON Lines: каждая запись пишется сразу, в памяти не копится весь список
+    count = 0
+    for record in records:
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    cache = HttpCache() if CACHE_DIR else None
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "w", encoding="utf-8") as output:
+            count = write_records(crawl(cache=cache), output)
     else:
-        views = None
-
-    articles_data.append({
-        "user_name": user_name,
-        'datetime': date_time,
-        "Link": link_absolute,
-        'title': title,
-        'text': article_body_text,
-        "views": views 
-    })
-
-print("Данные: ", articles_data)
\ No newline at end of file
+        count = write_records(crawl(cache=cache))
+    print(f"Статей: {count}", file=sys.stderr)
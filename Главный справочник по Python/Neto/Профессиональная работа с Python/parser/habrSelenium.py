@@ -1,3 +1,11 @@
+from queue import Queue
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver import Chrome
 from selenium.webdriver.chrome.service import Service
@@ -6,75 +14,172 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 
+HABR_URL = os.getenv("HABR_URL", "https://habr.com/ru/articles/")
+BROWSERS = int(os.getenv("BROWSERS", 4))  # сколько браузеров разбирают очередь статей
+PAGE_TIMEOUT = float(os.getenv("PAGE_TIMEOUT", 10))
+# Картинки, шрифты и стили для разбора не нужны, а грузятся дольше самой страницы
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "true").lower() in ("1", "true", "yes")
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*.css",
+]
+
 
 def wait_element(browser, delay_seconds=10, by=By.TAG_NAME, value=None):
     return WebDriverWait(browser, delay_seconds).until(
         EC.presence_of_element_located((by, value))
     )
 
+
 chrome_path = ChromeDriverManager().install()
-browser_service = Service(executable_path=chrome_path)
-options = Options()
-options.add_argument("--headless")
-options.add_experimental_option("detach", True)
-browser = Chrome(service=browser_service, options=options)
 
-browser.get("https://habr.com/ru/articles/")
 
-wait_element(browser, 10, By.CLASS_NAME, "tm-articles-list")
+def make_browser(block_resources=BLOCK_RESOURCES):
+    browser_service = Service(executable_path=chrome_path)
+    options = Options()
+    options.add_argument("--headless")
+    # get() возвращается на DOMContentLoaded, не дожидаясь всех подресурсов
+    options.page_load_strategy = "eager"
+    if block_resources:
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    browser = Chrome(service=browser_service, options=options)
+    if block_resources:
+        browser.execute_cdp_cmd("Network.enable", {})
+        browser.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    return browser
 
-articles_data = []
 
-article_list = browser.find_element(By.CLASS_NAME, "tm-articles-list")
-articles = article_list.find_elements(By.TAG_NAME, "article")
+def get_articles(browser, list_url):
+    browser.get(list_url)
 
-for article_tag in articles:
-    try:
-        user_name_tag = article_tag.find_element(By.CLASS_NAME, "tm-user-info__username")
-        user_name = user_name_tag.text.strip()
-    except Exception:
-        user_name = None
-    try:
-        time_tag = article_tag.find_element(By.TAG_NAME, "time")
-        date_time = time_tag.get_attribute("datetime")
-    except Exception:
-        date_time = None
-    try:
-        article_link_tag = article_tag.find_element(By.CLASS_NAME, "tm-title__link")
-        link_relative = article_link_tag.get_attribute("href")
-        link_absolute = link_relative if link_relative.startswith("http") else f"https://habr.com{link_relative}"
-        title = article_link_tag.text.strip()
-    except Exception:
-        link_absolute = None
-        title = None
-    if link_absolute:
-        browser.execute_script("window.open(arguments[0]);", link_absolute)
-        browser.switch_to.window(browser.window_handles[-1])
+    wait_element(browser, PAGE_TIMEOUT, By.CLASS_NAME, "tm-articles-list")
+
+    article_list = browser.find_element(By.CLASS_NAME, "tm-articles-list")
+    articles = article_list.find_elements(By.TAG_NAME, "article")
+
+    for article_tag in articles:
         try:
-            wait_element(browser, 10, By.ID, "post-content-body")
-            article_body_tag = browser.find_element(By.ID, "post-content-body")
-            article_body_text = article_body_tag.text.strip()[:100]
+            user_name_tag = article_tag.find_element(By.CLASS_NAME, "tm-user-info__username")
+            user_name = user_name_tag.text.strip()
         except Exception:
-            article_body_text = None
+            user_name = None
         try:
-            presenter_header_tag = browser.find_element(By.CLASS_NAME, "tm-article-presenter__header")
-            views_tag = presenter_header_tag.find_element(By.CLASS_NAME, "tm-icon-counter__value")
-            views = views_tag.text.strip()
+            time_tag = article_tag.find_element(By.TAG_NAME, "time")
+            date_time = time_tag.get_attribute("datetime")
         except Exception:
-            views = None
-        browser.close()
-        browser.switch_to.window(browser.window_handles[0])
-    else:
+            date_time = None
+        try:
+            article_link_tag = article_tag.find_element(By.CLASS_NAME, "tm-title__link")
+            link_relative = article_link_tag.get_attribute("href")
+            link_absolute = link_relative if link_relative.startswith("http") else f"https://habr.com{link_relative}"
+            title = article_link_tag.text.strip()
+        except Exception:
+            link_absolute = None
+            title = None
+        yield {
+            "user_name": user_name,
+            'datetime': date_time,
+            "Link": link_absolute,
+            'title': title,
+        }
+
+
+def scrape_article(browser, article):
+    """Открывает статью в браузере воркера и дописывает текст, просмотры и тайминги страницы."""
+    start = time.perf_counter()
+    browser.get(article["Link"])
+    loaded = time.perf_counter()
+    try:
+        article_body_tag = wait_element(browser, PAGE_TIMEOUT, By.ID, "post-content-body")
+        ready = time.perf_counter()
+        article_body_text = article_body_tag.text.strip()[:100]
+    except Exception:
+        ready = time.perf_counter()
         article_body_text = None
+    try:
+        presenter_header_tag = browser.find_element(By.CLASS_NAME, "tm-article-presenter__header")
+        views_tag = presenter_header_tag.find_element(By.CLASS_NAME, "tm-icon-counter__value")
+        views = views_tag.text.strip()
+    except Exception:
         views = None
-    articles_data.append({
-        "user_name": user_name,
-        'datetime': date_time,
-        "Link": link_absolute,
-        'title': title,
-        'text': article_body_text,
-        "views": views 
-    })
+    done = time.perf_counter()
+    article["text"] = article_body_text
+    article["views"] = views
+    article["timing"] = {"load": loaded - start, "wait": ready - loaded, "extract": done - ready, "total": done - start}
+    return article
+
+
+def worker(tasks, results, block_resources):
+    # Браузер создаётся внутри try: если Chrome не запустился, None всё равно уйдёт в results,
+    # иначе crawl() ждал бы этого воркера вечно. Его статьи разберут остальные воркеры
+    browser = None
+    try:
+        browser = make_browser(block_resources)
+        while (article := tasks.get()) is not None:
+            try:
+                results.put(scrape_article(browser, article))
+            except Exception:
+                article["text"] = article["views"] = article["timing"] = None
+                results.put(article)
+    finally:
+        if browser is not None:
+            browser.quit()
+        results.put(None)
+
+
+def crawl(list_url=HABR_URL, browsers=BROWSERS, block_resources=BLOCK_RESOURCES):
+    """Ленту читает один браузер, статьи из очереди разбирают browsers браузеров параллельно.
+
+    Записи отдаются по мере готовности. WebDriver не потокобезопасен, поэтому у каждого
+    потока свой браузер, а не вкладка общего.
+    """
+    tasks, results = Queue(), Queue()
+    workers = [
+        threading.Thread(target=worker, args=(tasks, results, block_resources), daemon=True)
+        for _ in range(browsers)
+    ]
+    # Браузеры стартуют, пока читается лента
+    for thread in workers:
+        thread.start()
+    # Как и в worker: если браузер ленты не запустился, воркеры всё равно получают None и закрывают свои браузеры
+    browser = None
+    try:
+        browser = make_browser(block_resources)
+        for article in get_articles(browser, list_url):
+            if article["Link"]:
+                tasks.put(article)
+            else:
+                yield {**article, "text": None, "views": None, "timing": None}
+    finally:
+        if browser is not None:
+            browser.quit()
+        for _ in workers:
+            tasks.put(None)
+    running = len(workers)
+    while running:
+        article = results.get()
+        if article is None:
+            running -= 1
+        else:
+            yield article
+
+
+def timing_report(records):
+    totals = sorted(record["timing"]["total"] for record in records if record.get("timing"))
+    if not totals:
+        return "no pages"
+    p95 = totals[min(len(totals) - 1, int(len(totals) * 0.95))]
+    return (
+        f"pages {len(totals)}, mean {statistics.mean(totals):.2f} s, "
+        f"p50 {statistics.median(totals):.2f} s, p95 {p95:.2f} s, max {totals[-1]:.2f} s"
+    )
 
-print("Данные:", articles_data)
 
+if __name__ == "__main__":
+    start = time.perf_counter()
+    articles_data = []
+    for record in crawl():
+        print(json.dumps(record, ensure_ascii=False), flush=True)
+        articles_data.append(record)
+    print(timing_report(articles_data), file=sys.stderr)
+    print(f"Time spent: {time.perf_counter() - start:.2f} s", file=sys.stderr)
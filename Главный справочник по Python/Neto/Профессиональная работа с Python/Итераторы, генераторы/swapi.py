@@ -1,46 +1,124 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
 import requests
 
-URL = "https://swapi.dev/api/films/2"
+URL = "https://swapi.dev/api/people/"
 
-response = requests.get(URL, verify=False)
-data = response.json()
-print(data)
 
 class SwapiIterator:
+    """Итератор по постраничному API (results + next), как у SWAPI.
+
+    Пока вызывающий код разбирает страницу N, страница N+1 уже скачивается в фоне.
+    В памяти одновременно только текущая и следующая страницы, все запросы идут
+    через одну requests.Session (keep-alive, пул соединений).
+    """
+
+    def __init__(self, url=URL, session=None, results_key="results", next_key="next"):
+        self.url = url
+        self.session = session or requests.Session()
+        # Чужую сессию (например, общую на всё приложение) не закрываем
+        self._own_session = session is None
+        self.results_key = results_key
+        self.next_key = next_key
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def get_page(self, url):
+        response = self.session.get(url, verify=False)
+        response.raise_for_status()
+        return response.json()
 
-    def __init__(self): 
-        pass
-    
-    def get_current_result(self):
-        response = requests.get(self.next_page, verify=False).json()
-        self.current_result = iter(response["results"])
-        self.next_page = response["next"]
-        
-    def get_next_res(self):
-        try:
-            next_character = next(self.current_result)
-        except StopAsyncIteration:
-            self.get_current_result()
-        return next_character
+    def _prefetch(self, url):
+        return self._executor.submit(self.get_page, url) if url else None
 
     def __iter__(self):
-        self.next_page = URL
         self.current_result = iter([])
-        
+        self.next_page = self._prefetch(self.url)
         return self
 
     def __next__(self):
-        next_character = self.get_next_res()
-        
-        if next_character == 0:
-            if self.next_page is None:
-                raise StopAsyncIteration
-            
-            self.get_current_result()
-        
-        return next_character
-
-hello_iterator = SwapiIterator()
-
-for item in hello_iterator:
-    print(item)
\ No newline at end of file
+        while True:
+            try:
+                return next(self.current_result)
+            except StopIteration:
+                if self.next_page is None:
+                    raise
+                page = self.next_page.result()
+                # Следующая страница начинает качаться до того, как мы отдадим первый элемент текущей
+                self.next_page = self._prefetch(page[self.next_key])
+                self.current_result = iter(page[self.results_key])
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._own_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncSwapiIterator:
+    """То же самое для async for: предзагрузка следующей страницы задачей asyncio, одна aiohttp.ClientSession."""
+
+    def __init__(self, url=URL, session=None, results_key="results", next_key="next"):
+        self.url = url
+        self.session = session
+        self._own_session = session is None
+        self.results_key = results_key
+        self.next_key = next_key
+
+    async def get_page(self, url):
+        async with self.session.get(url, ssl=False) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    def _prefetch(self, url):
+        return asyncio.create_task(self.get_page(url)) if url else None
+
+    def __aiter__(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        self.current_result = iter([])
+        self.next_page = self._prefetch(self.url)
+        return self
+
+    async def __anext__(self):
+        while True:
+            try:
+                return next(self.current_result)
+            except StopIteration:
+                if self.next_page is None:
+                    raise StopAsyncIteration
+                page = await self.next_page
+                self.next_page = self._prefetch(page[self.next_key])
+                self.current_result = iter(page[self.results_key])
+
+    async def close(self):
+        if getattr(self, "next_page", None) is not None:
+            self.next_page.cancel()
+        if self._own_session and self.session is not None:
+            await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+async def main():
+    async with AsyncSwapiIterator() as characters:
+        async for item in characters:
+            print(item["name"])
+
+
+if __name__ == "__main__":
+    with SwapiIterator() as characters:
+        for item in characters:
+            print(item["name"])
+
+    asyncio.run(main())